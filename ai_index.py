@@ -1,7 +1,8 @@
 import yfinance as yf
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
+
+from data_quality import format_report, validate_frame
 
 # Global Indices list (we can add more if needed)
 indices = {
@@ -18,6 +19,7 @@ indices = {
 # Parameters
 RSI_PERIOD = 14
 MA_PERIOD = 50
+DATA_QUALITY_POLICY = 'flag'  # 'flag', 'mask' or 'repair' bad prints, splits and stale prices
 
 # Fetch Index Data Function
 def fetch_index_data(index_symbol, start_date='2023-01-01', end_date='2025-01-01'):
@@ -28,6 +30,11 @@ def fetch_index_data(index_symbol, start_date='2023-01-01', end_date='2025-01-01
         if 'Adj Close' not in data.columns:
             print(f"Warning: 'Adj Close' column missing for {index_symbol}, using 'Close' instead.")
             data['Adj Close'] = data['Close']  # Fallback to 'Close' if 'Adj Close' is missing
+        if not data.empty:
+            data, report = validate_frame(data, index_symbol, policy=DATA_QUALITY_POLICY,
+                                          price_column='Adj Close')
+            for line in format_report(report):
+                print(f"Data quality {line}")
         return data
     except Exception as e:
         print(f"Error fetching data for {index_symbol}: {str(e)}")
@@ -60,7 +67,8 @@ def calculate_daily_returns(data):
     return data
 
 # Evaluate each index based on the strategy
-def evaluate_indices(indices, start_date='2023-01-01', end_date='2025-01-01'):
+def evaluate_indices(indices, start_date='2023-01-01', end_date='2025-01-01', frames=None):
+    """Score each index; if `frames` is a dict, the computed data is stored in it by index name."""
     scores = []
     for index_name, index_symbol in indices.items():
         print(f"Evaluating {index_name}...")
@@ -69,6 +77,8 @@ def evaluate_indices(indices, start_date='2023-01-01', end_date='2025-01-01'):
             data = calculate_daily_returns(data)
             data['RSI'] = calculate_rsi(data)
             data['MA50'] = calculate_moving_average(data)
+            if frames is not None:
+                frames[index_name] = data
 
             # Calculate momentum: If RSI > 50, consider it bullish momentum
             momentum_score = data['RSI'].iloc[-1] / 100  # RSI score between 0 and 1
@@ -88,10 +98,17 @@ def evaluate_indices(indices, start_date='2023-01-01', end_date='2025-01-01'):
 
     return scores
 
+# Chart layout for the headless report
+REPORT_PANELS = [
+    {'series': [('RSI', {}), ('Adj Close', {}), ('MA50', {})]},
+]
+
 # Main function to get the best indices for today
-def suggest_best_indices():
+def suggest_best_indices(report_dir=None):
+    """Print the top 2 indices and plot them, or write a headless report to report_dir."""
     print("Evaluating indices for the best trading opportunities...")
-    scores = evaluate_indices(indices)
+    frames = {}
+    scores = evaluate_indices(indices, frames=frames)
     top_2 = scores[:2]  # Select the top 2 indices based on the highest score
 
     # Display the best 2 trade suggestions
@@ -99,15 +116,26 @@ def suggest_best_indices():
     for idx, (index_name, score) in enumerate(top_2, 1):
         print(f"{idx}. {index_name} - Score: {score:.4f}")
 
+    if report_dir:
+        from index_report import write_report
+        write_report([(name, score, frames[name]) for name, score in top_2], report_dir,
+                     REPORT_PANELS, title="Best 2 Indices to Trade Today")
+        return
+
+    import matplotlib.pyplot as plt
+
     # Optionally, you can plot the RSI, MA, and daily returns of these top 2 indices for visualization
     for index_name, _ in top_2:
-        data = fetch_index_data(indices[index_name])
-        if data is not None:
-            data = calculate_daily_returns(data)
-            data['RSI'] = calculate_rsi(data)
-            data['MA50'] = calculate_moving_average(data)
-            data[['RSI', 'Adj Close', 'MA50']].plot(figsize=(10, 6), title=index_name)
-            plt.show()
+        data = frames[index_name]  # Reuse the data computed during evaluation
+        data[['RSI', 'Adj Close', 'MA50']].plot(figsize=(10, 6), title=index_name)
+        plt.show()
 
 if __name__ == "__main__":
-    suggest_best_indices()
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Suggest the best global indices to trade")
+    parser.add_argument("--report", metavar="DIR",
+                        help="Write PNG charts and index.html to DIR instead of showing plots")
+    args = parser.parse_args()
+
+    suggest_best_indices(args.report)
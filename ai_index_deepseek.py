@@ -1,8 +1,8 @@
 import yfinance as yf
 import pandas as pd
-import numpy as np
-import matplotlib.pyplot as plt
-from sklearn.preprocessing import MinMaxScaler
+
+from data_quality import format_report, validate_frame
+from profiling import NULL_TRACER
 
 # Enhanced Global Indices list with regions
 indices = {
@@ -41,6 +41,10 @@ TA_CONFIG = {
     'bollinger_std': 2
 }
 
+# What to do with bad prints, splits and stale prices: 'flag', 'mask' or 'repair'.
+# Flag only by default, so real market moves are never rewritten.
+DATA_QUALITY_POLICY = 'flag'
+
 # Scoring Weights
 SCORE_WEIGHTS = {
     'momentum': 0.35,
@@ -49,24 +53,31 @@ SCORE_WEIGHTS = {
     'volume': 0.15
 }
 
-def fetch_index_data(index_symbol, start_date='2020-01-01', end_date=None):
+def fetch_index_data(index_symbol, start_date='2020-01-01', end_date=None, tracer=NULL_TRACER):
     """Enhanced data fetcher with caching and validation"""
     try:
-        data = yf.download(
-            index_symbol, 
-            start=start_date, 
-            end=end_date,
-            progress=False,
-            auto_adjust=True  # Use adjusted prices automatically
-        )
+        with tracer.stage('download'):
+            data = yf.download(
+                index_symbol, 
+                start=start_date, 
+                end=end_date,
+                progress=False,
+                auto_adjust=True  # Use adjusted prices automatically
+            )
         
         if data.empty:
             raise ValueError("No data returned")
+        
+        with tracer.stage('validate'):
+            data, report = validate_frame(data, index_symbol, policy=DATA_QUALITY_POLICY)
+        for line in format_report(report):
+            print(f"Data quality {line}")
             
         # Add technical columns
-        data['Index'] = index_symbol
-        data['Daily Return'] = data['Close'].pct_change() * 100
-        data = calculate_technical_indicators(data)
+        with tracer.stage('indicators'):
+            data['Index'] = index_symbol
+            data['Daily Return'] = data['Close'].pct_change() * 100
+            data = calculate_technical_indicators(data)
         
         return data.dropna()
         
@@ -106,9 +117,6 @@ def calculate_score(data):
     if data is None or len(data) < 100:
         return 0
     
-    # Normalize metrics
-    scaler = MinMaxScaler()
-    
     # Momentum Factor (RSI + MACD)
     momentum = (
         0.7 * (data['RSI'].iloc[-1] / 100) + 
@@ -136,63 +144,119 @@ def calculate_score(data):
         'volume': volume
     }
     
-    # Apply weights and normalize
+    # Apply weights (min-max scaling a single value always gave 0, so the raw
+    # weighted sum is returned; scores are only compared against each other)
     weighted_scores = [factors[k] * SCORE_WEIGHTS[k] for k in SCORE_WEIGHTS]
-    final_score = sum(weighted_scores)
-    
-    # Reshape the final score to a 2D array (1 row, 1 column)
-    final_score_reshaped = np.array([[final_score]])
-    
-    # Normalize the final score using MinMaxScaler
-    return scaler.fit_transform(final_score_reshaped)[0][0]
+    return float(sum(weighted_scores))
+
+# Chart layout for the headless report, matching the interactive plots below
+REPORT_PANELS = [
+    {
+        'series': [('Close', {})] + [(f'MA{period}', {}) for period in TA_CONFIG['ma_periods']] + [
+            ('Bollinger_Upper', {'linestyle': '--', 'color': 'red', 'alpha': 0.5}),
+            ('Bollinger_Lower', {'linestyle': '--', 'color': 'green', 'alpha': 0.5}),
+        ],
+        'ylabel': 'Price',
+    },
+    {
+        'series': [
+            ('RSI', {'color': 'purple'}),
+            ('MACD', {'color': 'orange'}),
+            ('MACD_Signal', {'color': 'blue'}),
+        ],
+        'hlines': [(70, {'linestyle': '--', 'color': 'red'}), (30, {'linestyle': '--', 'color': 'green'})],
+        'ylabel': 'Oscillators',
+    },
+]
+
+def analyze_indices(report_dir=None, diversify=False, tracer=NULL_TRACER):
+    """Main analysis function with enhanced visualization
 
-def analyze_indices():
-    """Main analysis function with enhanced visualization"""
+    With report_dir set, charts for the top 5 are rendered headlessly into that
+    directory instead of being shown. With diversify, the top 5 are taken from
+    different return-correlation clusters (see index_correlation). Pass a
+    profiling.Tracer to time each stage and index.
+    """
     results = []
     
     for index_name, symbol in indices.items():
         print(f"Analyzing {index_name}...")
-        data = fetch_index_data(symbol)
-        if data is not None:
-            score = calculate_score(data)
-            results.append((index_name, score, data))
+        with tracer.span(index_name, symbol=symbol):
+            data = fetch_index_data(symbol, tracer=tracer)
+            if data is not None:
+                with tracer.stage('score'):
+                    score = calculate_score(data)
+                results.append((index_name, score, data))
     
     # Sort by score descending
     results.sort(key=lambda x: x[1], reverse=True)
     
+    if diversify:
+        from index_correlation import diversify_results
+        with tracer.stage('diversify'):
+            results = diversify_results(results, k=5)
+    
     # Display top 5 indices
     print("\n=== Top 5 Indices ===")
     for idx, (name, score, data) in enumerate(results[:5], 1):
         print(f"{idx}. {name}: {score:.2f}")
+    
+    if report_dir:
+        from index_report import write_report
+        with tracer.stage('report'):
+            write_report(results[:5], report_dir, REPORT_PANELS, title="Top 5 Indices")
+        return results
+    
+    import matplotlib.pyplot as plt
+    
+    for name, score, data in results[:5]:
+        with tracer.stage('plot'):  # Drawing only; plt.show() waits on the user
+            # Plot technical indicators
+            plt.figure(figsize=(12, 6))
+            plt.title(f"{name} Technical Analysis")
         
-        # Plot technical indicators
-        plt.figure(figsize=(12, 6))
-        plt.title(f"{name} Technical Analysis")
-        
-        # Price and Moving Averages
-        plt.subplot(2, 1, 1)
-        plt.plot(data['Close'], label='Price')
-        for period in TA_CONFIG['ma_periods']:
-            plt.plot(data[f'MA{period}'], label=f'MA{period}')
-        plt.plot(data['Bollinger_Upper'], linestyle='--', color='red', alpha=0.5)
-        plt.plot(data['Bollinger_Lower'], linestyle='--', color='green', alpha=0.5)
-        plt.ylabel('Price')
-        plt.legend()
+            # Price and Moving Averages
+            plt.subplot(2, 1, 1)
+            plt.plot(data['Close'], label='Price')
+            for period in TA_CONFIG['ma_periods']:
+                plt.plot(data[f'MA{period}'], label=f'MA{period}')
+            plt.plot(data['Bollinger_Upper'], linestyle='--', color='red', alpha=0.5)
+            plt.plot(data['Bollinger_Lower'], linestyle='--', color='green', alpha=0.5)
+            plt.ylabel('Price')
+            plt.legend()
         
-        # RSI and MACD
-        plt.subplot(2, 1, 2)
-        plt.plot(data['RSI'], label='RSI', color='purple')
-        plt.plot(data['MACD'], label='MACD', color='orange')
-        plt.plot(data['MACD_Signal'], label='Signal', color='blue')
-        plt.axhline(70, linestyle='--', color='red')
-        plt.axhline(30, linestyle='--', color='green')
-        plt.ylabel('Oscillators')
-        plt.legend()
+            # RSI and MACD
+            plt.subplot(2, 1, 2)
+            plt.plot(data['RSI'], label='RSI', color='purple')
+            plt.plot(data['MACD'], label='MACD', color='orange')
+            plt.plot(data['MACD_Signal'], label='Signal', color='blue')
+            plt.axhline(70, linestyle='--', color='red')
+            plt.axhline(30, linestyle='--', color='green')
+            plt.ylabel('Oscillators')
+            plt.legend()
         
-        plt.tight_layout()
+            plt.tight_layout()
         plt.show()
     
     return results
 
 if __name__ == "__main__":
-    analyze_indices()
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Rank global indices by technical score")
+    parser.add_argument("--report", metavar="DIR",
+                        help="Write PNG charts and index.html to DIR instead of showing plots")
+    parser.add_argument("--diversify", action="store_true",
+                        help="Pick the top 5 from different correlation clusters")
+    parser.add_argument("--trace", metavar="FILE",
+                        help="Record stage and per-index timings to a Chrome trace JSON file")
+    args = parser.parse_args()
+
+    if args.trace:
+        from profiling import Tracer
+        tracer = Tracer()
+        analyze_indices(args.report, args.diversify, tracer)
+        tracer.write_chrome_trace(args.trace)
+        print(tracer.summary())
+    else:
+        analyze_indices(args.report, args.diversify)
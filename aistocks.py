@@ -3,9 +3,8 @@ import numpy as np
 import yfinance as yf
 import requests
 from sklearn.preprocessing import MinMaxScaler
-from pypfopt import EfficientFrontier, objective_functions
-from pypfopt.risk_models import CovarianceShrinkage
-from pypfopt.expected_returns import ema_historical_return
+
+from profiling import NULL_TRACER
 
 # Configuration
 CONFIG = {
@@ -137,6 +136,11 @@ class StockAnalyzer:
 
     def optimize_portfolio(self, df_top_stocks):
         """Calculate optimal portfolio allocation"""
+        # pypfopt is slow to import and only needed here
+        from pypfopt import EfficientFrontier, objective_functions
+        from pypfopt.risk_models import CovarianceShrinkage
+        from pypfopt.expected_returns import ema_historical_return
+
         try:
             # Get historical returns
             prices = yf.download(list(df_top_stocks['ticker']), period='3y')['Adj Close']
@@ -156,7 +160,8 @@ class StockAnalyzer:
             print(f"Optimization Error: {str(e)}")
             return None
 
-def main():
+def main(tracer=NULL_TRACER):
+    """Screen the stock universe; pass a profiling.Tracer to time each stage and ticker"""
     analyzer = StockAnalyzer()
     
     # Step 1: Collect data with error handling
@@ -164,12 +169,16 @@ def main():
     stocks_data = []
     for ticker in CONFIG['stock_universe']:
         try:
-            data = analyzer.get_fundamentals(ticker)
-            if data and not data['pe_ratio'] is None:
-                data['rsi'] = analyzer.calculate_rsi(ticker)
-                data['esg'] = analyzer.get_esg_score(ticker)
-                print(f"Data for {ticker}: {data}")  # Debugging line
-                stocks_data.append(data)
+            with tracer.span(ticker):
+                with tracer.stage('fundamentals'):
+                    data = analyzer.get_fundamentals(ticker)
+                if data and not data['pe_ratio'] is None:
+                    with tracer.stage('rsi'):
+                        data['rsi'] = analyzer.calculate_rsi(ticker)
+                    with tracer.stage('esg'):
+                        data['esg'] = analyzer.get_esg_score(ticker)
+                    print(f"Data for {ticker}: {data}")  # Debugging line
+                    stocks_data.append(data)
         except Exception as e:
             print(f"Main Error for {ticker}: {str(e)}")
     
@@ -180,7 +189,8 @@ def main():
     df = pd.DataFrame(stocks_data)
     
     # Step 2: Score stocks
-    scored_df = analyzer.score_stocks(df)
+    with tracer.stage('score'):
+        scored_df = analyzer.score_stocks(df)
     if scored_df.empty:
         print("No stocks passed scoring criteria.")
         return
@@ -189,7 +199,8 @@ def main():
     
     # Step 3: Portfolio optimization
     print("\nOptimizing portfolio...")
-    allocations = analyzer.optimize_portfolio(top_stocks)
+    with tracer.stage('optimize'):
+        allocations = analyzer.optimize_portfolio(top_stocks)
     
     if not allocations:
         print("Portfolio optimization failed.")
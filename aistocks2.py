@@ -1,6 +1,7 @@
 import yfinance as yf
 import pandas as pd
-import matplotlib.pyplot as plt
+
+from market_panel import MarketPanel
 
 # Configuration: List of global market indices
 indices = {
@@ -39,16 +40,24 @@ def track_indices(indices, start_date='2000-01-01', end_date='2025-01-01'):
     return pd.concat(all_data)
 
 # Function to calculate percentage change
-def calculate_returns(df):
-    """Calculate daily returns for each index."""
-    df['Daily Return'] = df['Adj Close'].pct_change() * 100
+def calculate_returns(df, panel=None):
+    """Calculate daily returns for each index.
+
+    Returns are taken per index on its own calendar via the aligned panel; a
+    plain pct_change over the stacked frame ran from one index into the next.
+    """
+    panel = panel or MarketPanel.from_stacked(df)
+    df['Daily Return'] = panel.gather(panel.returns('Adj Close')) * 100
     return df
 
 # Function to plot index performance
-def plot_performance(df):
+def plot_performance(df, panel=None):
     """Plot the performance of each index."""
-    df_grouped = df.groupby('Index').last()  # Get the last data point for each index
-    df_grouped = df_grouped['Adj Close'].sort_values(ascending=False)
+    import matplotlib.pyplot as plt
+
+    panel = panel or MarketPanel.from_stacked(df)
+    df_grouped = pd.Series(panel.latest('Adj Close'), index=panel.symbols)  # Latest value of each index
+    df_grouped = df_grouped.sort_values(ascending=False)
     
     df_grouped.plot(kind='bar', figsize=(10, 6), title="Global Market Index Performance (Latest)")
     plt.ylabel('Index Value')
@@ -65,17 +74,18 @@ def main():
     # Fetch and track index data
     print("Collecting global market index data...")
     df = track_indices(indices)
+    panel = MarketPanel.from_stacked(df)  # Align the trading calendars once
 
     # Calculate returns
     print("Calculating daily returns...")
-    df_with_returns = calculate_returns(df)
+    df_with_returns = calculate_returns(df, panel)
 
     # Save the data to a CSV file
     save_data(df_with_returns)
 
     # Plot the performance
     print("Plotting the global market index performance...")
-    plot_performance(df_with_returns)
+    plot_performance(df_with_returns, panel)
 
     # Optionally: track weekly or monthly returns, visualize trends, etc.
     # You can extend this functionality with further analysis, e.g., weekly/monthly returns, volatility, etc.
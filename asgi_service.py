@@ -0,0 +1,213 @@
+"""Synchronous ASGI variant of POST /send_love.
+
+Unlike the Flask apps (send_love.py, send_love2.py, send_love_f.py), which
+queue the send and answer 202 with a job_id to poll at
+/send_love/status/<job_id>, this service sends inline and answers 200 with the
+Twilio message sid (502 if Twilio fails). There is no status endpoint; delivery
+updates arrive through STATUS_CALLBACK_URL at a Flask app's /twilio/status.
+"""
+import asyncio
+import json
+import os
+import random
+import uuid
+
+import aiohttp
+
+from delivery_store import IdempotencyStore
+
+# Load credentials securely using environment variables
+ACCOUNT_SID = os.getenv('ACCOUNT_SID')
+AUTH_TOKEN = os.getenv('AUTH_TOKEN')
+TWILIO_PHONE_NUMBER = os.getenv('TWILIO_PHONE_NUMBER')
+DEEPSEEK_API_KEY = os.getenv('DEEPSEEK_API_KEY')
+
+# Upstream base URLs (point these at fake_upstreams.py for load tests)
+TWILIO_API_URL = os.getenv('TWILIO_API_URL', 'https://api.twilio.com')
+DEEPSEEK_API_URL = os.getenv('DEEPSEEK_API_URL', 'https://api.deepseek.com')
+
+# Connection pool and latency settings
+POOL_SIZE = int(os.getenv('UPSTREAM_POOL_SIZE', '200'))
+UPSTREAM_TIMEOUT = float(os.getenv('UPSTREAM_TIMEOUT', '10'))
+AI_REPLY_BUDGET = float(os.getenv('AI_REPLY_BUDGET', '3'))
+
+# Shared with the Flask apps, so a key used on either path is only sent once
+DELIVERY_DB = os.getenv('DELIVERY_DB', 'delivery.db')
+STATUS_CALLBACK_URL = os.getenv('STATUS_CALLBACK_URL')  # Public URL of a Flask app's /twilio/status
+
+# List of love and caring messages
+messages = [
+    "You're amazing just the way you are! 💖",
+    "Sending you a big virtual hug! 🤗",
+    "You are loved more than you know. 💕",
+    "Take a deep breath, everything will be okay. 🌸",
+    "Believe in yourself, because I believe in you! ✨",
+    "You're stronger than you think. Keep going! 💪",
+    "Never forget how special you are. 💝",
+    "A smile suits you best! Keep shining. 😊",
+    "You matter. The world is better with you in it. 🌍❤️",
+    "You are enough, just as you are. 🌿"
+]
+
+# Per-process upstream clients and idempotency store, created on ASGI lifespan startup
+clients = {}
+stores = {}
+
+
+async def startup():
+    stores['sends'] = IdempotencyStore(DELIVERY_DB)
+    timeout = aiohttp.ClientTimeout(total=UPSTREAM_TIMEOUT)
+    clients['twilio'] = aiohttp.ClientSession(
+        TWILIO_API_URL,
+        connector=aiohttp.TCPConnector(limit=POOL_SIZE, keepalive_timeout=60),
+        auth=aiohttp.BasicAuth(ACCOUNT_SID or '', AUTH_TOKEN or ''),
+        timeout=timeout,
+    )
+    clients['deepseek'] = aiohttp.ClientSession(
+        DEEPSEEK_API_URL,
+        connector=aiohttp.TCPConnector(limit=POOL_SIZE, keepalive_timeout=60),
+        headers={'Authorization': f'Bearer {DEEPSEEK_API_KEY}'},
+        timeout=timeout,
+    )
+
+
+async def shutdown():
+    for client in clients.values():
+        await client.close()
+    clients.clear()
+    stores.clear()
+
+
+async def _post_json(client, path, **kwargs):
+    async with client.post(path, **kwargs) as response:
+        response.raise_for_status()
+        return await response.json()
+
+
+async def ai_reply(user_message):
+    """Ask DeepSeek for a reply, falling back to a canned message past the budget"""
+    try:
+        payload = await asyncio.wait_for(
+            _post_json(clients['deepseek'], '/chat/completions', json={
+                'model': 'deepseek-chat',
+                'messages': [{'role': 'user', 'content': user_message}],
+            }),
+            AI_REPLY_BUDGET,
+        )
+        return payload['choices'][0]['message']['content']
+    except Exception:
+        return random.choice(messages)
+
+
+async def send_sms(to, body):
+    """Send a message through the Twilio REST API and return its SID"""
+    data = {'To': to, 'From': TWILIO_PHONE_NUMBER, 'Body': body}
+    if STATUS_CALLBACK_URL:
+        data['StatusCallback'] = STATUS_CALLBACK_URL
+    payload = await _post_json(
+        clients['twilio'],
+        f'/2010-04-01/Accounts/{ACCOUNT_SID}/Messages.json',
+        data=data,
+    )
+    return payload['sid']
+
+
+async def send_love(data, idempotency_key=None):
+    user_number = data.get("user_number")
+    user_message = data.get("message", "")
+
+    if not user_number:
+        return 400, {"error": "User number is required"}
+
+    request_id = uuid.uuid4().hex
+    key = idempotency_key or data.get("idempotency_key")
+    if key:
+        existing = await asyncio.to_thread(stores['sends'].claim, key, request_id)
+        if existing is not None:
+            return 200, {"message": "Duplicate request, already sent", "request_id": existing}
+
+    if user_message:
+        response = await ai_reply(user_message)
+    else:
+        response = random.choice(messages)
+
+    try:
+        sid = await send_sms(user_number, response)
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        if key:
+            await asyncio.to_thread(stores['sends'].release, key)  # Let the client retry
+        return 502, {"error": f"Twilio request failed: {e}"}
+
+    return 200, {"message": "Response sent successfully!", "sid": sid, "request_id": request_id}
+
+
+async def _read_body(receive):
+    body = b''
+    while True:
+        message = await receive()
+        body += message.get('body', b'')
+        if not message.get('more_body'):
+            return body
+
+
+async def _respond(send, status, payload):
+    data = json.dumps(payload).encode()
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(b'content-type', b'application/json'), (b'content-length', str(len(data)).encode())],
+    })
+    await send({'type': 'http.response.body', 'body': data})
+
+
+async def app(scope, receive, send):
+    """ASGI entry point for the synchronous POST /send_love (200 with sid) and GET /healthz"""
+    if scope['type'] == 'lifespan':
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await startup()
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await shutdown()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    if scope['type'] != 'http':
+        return
+
+    if scope['path'] == '/healthz':
+        await _respond(send, 200, {"status": "ok"})
+        return
+    if scope['path'] != '/send_love':
+        await _respond(send, 404, {"error": "Not found"})
+        return
+    if scope['method'] != 'POST':
+        await _respond(send, 405, {"error": "Method not allowed"})
+        return
+
+    try:
+        data = json.loads(await _read_body(receive) or b'{}')
+    except ValueError:
+        await _respond(send, 400, {"error": "Invalid JSON body"})
+        return
+
+    headers = dict(scope.get('headers', []))
+    key = headers.get(b'idempotency-key', b'').decode() or None
+    status, payload = await send_love(data, key)
+    await _respond(send, status, payload)
+
+
+if __name__ == '__main__':
+    import argparse
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Synchronous /send_love service (sends inline, returns the sid)")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("-w", "--workers", type=int, default=os.cpu_count() or 1,
+                        help="Number of worker processes")
+    args = parser.parse_args()
+
+    uvicorn.run("asgi_service:app", host=args.host, port=args.port, workers=args.workers,
+                log_level="warning", access_log=False)
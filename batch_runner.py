@@ -0,0 +1,203 @@
+import os
+import json
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Dict, Iterator, Set
+
+from model_metrics import ModelMetrics
+from rate_limiter import RateLimiter
+from test import ModelClient, ConversationOrchestrator
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PROVIDER_CONCURRENCY = 4
+
+
+class LimitedModelClient:
+    """Wrap a ModelClient with a concurrency cap and rate limit per provider"""
+
+    def __init__(self, model_client: ModelClient, concurrency: Dict[str, int] = None,
+                 rates: Dict[str, float] = None):
+        self.model_client = model_client
+        self.concurrency = concurrency or {}
+        self.rates = rates or {}
+        self.semaphores = {}
+        self.limiters = {}
+        self.lock = threading.Lock()
+
+    def _limits_for(self, provider: str):
+        with self.lock:
+            if provider not in self.semaphores:
+                limit = self.concurrency.get(provider, DEFAULT_PROVIDER_CONCURRENCY)
+                self.semaphores[provider] = threading.BoundedSemaphore(limit)
+                self.limiters[provider] = RateLimiter(self.rates.get(provider))
+            return self.semaphores[provider], self.limiters[provider]
+
+    def generate_response(self, model: str, prompt: str) -> str:
+        """Generate a response once the model's provider has a free slot"""
+        semaphore, limiter = self._limits_for(self.model_client.provider_for(model))
+        with semaphore:
+            limiter.acquire()
+            return self.model_client.generate_response(model, prompt)
+
+
+def read_prompts(path: str) -> Iterator[Dict]:
+    """Stream prompt records from a JSONL file, one record per line; malformed lines are logged and skipped"""
+    with open(path) as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                logger.warning(f"Skipping malformed line {line_number} of {path}: {e}")
+                continue
+            if not isinstance(record, dict):
+                logger.warning(f"Skipping line {line_number} of {path}: expected a JSON object")
+                continue
+            record.setdefault("id", str(line_number))
+            if "prompt" not in record:
+                # Allow backlog-style records that only have title/body
+                record["prompt"] = "\n\n".join(
+                    part for part in (record.get("title"), record.get("body")) if part
+                )
+            yield record
+
+
+def load_completed(path: str) -> Set[str]:
+    """Return the ids that already have a successful result in the output file"""
+    completed = set()
+    if not os.path.exists(path):
+        return completed
+    with open(path) as f:
+        for line in f:
+            try:
+                result = json.loads(line)
+            except ValueError:
+                continue  # Partial line left behind by a crash
+            if result.get("status") == "ok":
+                completed.add(str(result["id"]))
+    return completed
+
+
+def _ends_with_newline(path: str) -> bool:
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        if f.tell() == 0:
+            return True
+        f.seek(-1, os.SEEK_END)
+        return f.read(1) == b"\n"
+
+
+def run_one(model_client, record: Dict, iterations: int, early_stop_threshold: float = None) -> Dict:
+    """Run a single conversation and return its result record"""
+    orchestrator = ConversationOrchestrator(model_client)
+    try:
+        history = orchestrator.run_conversation(
+            record["prompt"], record.get("iterations", iterations), early_stop_threshold
+        )
+    except Exception as e:
+        logger.error(f"Conversation {record['id']} failed: {str(e)}")
+        return {"id": record["id"], "status": "error", "error": str(e)}
+    if not history:
+        return {"id": record["id"], "status": "error", "error": "No model responded"}
+    return {"id": record["id"], "status": "ok", "history": history}
+
+
+def run_batch(input_path: str, output_path: str, model_client=None, workers: int = 16,
+              iterations: int = 3, early_stop_threshold: float = None) -> Dict[str, int]:
+    """Run every prompt in input_path, appending results to output_path as they finish.
+
+    Prompts whose id already has an "ok" result in output_path are skipped, so an
+    interrupted run can be restarted with the same arguments. At most 2 * workers
+    prompts are held in memory at any time.
+    """
+    model_client = model_client or LimitedModelClient(ModelClient())
+    completed = load_completed(output_path)
+    counts = {"ok": 0, "error": 0, "skipped": 0}
+    max_pending = workers * 2
+
+    with open(output_path, "a") as out, ThreadPoolExecutor(max_workers=workers) as pool:
+        # Make sure a half-written line from a crash does not swallow the next result
+        if not _ends_with_newline(output_path):
+            out.write("\n")
+
+        pending = set()
+
+        def drain(block_until):
+            nonlocal pending
+            while len(pending) > block_until:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    result = future.result()
+                    out.write(json.dumps(result) + "\n")
+                    out.flush()
+                    counts[result["status"]] += 1
+
+        try:
+            for record in read_prompts(input_path):
+                if str(record["id"]) in completed:
+                    counts["skipped"] += 1
+                    continue
+                pending.add(pool.submit(run_one, model_client, record, iterations, early_stop_threshold))
+                drain(max_pending - 1)
+        finally:
+            # Write out conversations already in flight even if reading the input failed
+            drain(0)
+
+    logger.info(f"Batch finished: {counts}")
+    return counts
+
+
+def _parse_limits(values, cast):
+    """Parse repeated provider=value arguments into a dict"""
+    limits = {}
+    for value in values or []:
+        provider, _, limit = value.partition("=")
+        limits[provider] = cast(limit)
+    return limits
+
+
+if __name__ == "__main__":
+    import argparse
+
+    logging.basicConfig(level=logging.INFO)
+
+    parser = argparse.ArgumentParser(description="Batch LLM Conversation Runner")
+    parser.add_argument("input", help="JSONL file with one {\"id\", \"prompt\"} record per line")
+    parser.add_argument("output", help="JSONL file results are appended to (also used to resume)")
+    parser.add_argument("-i", "--iterations", type=int, default=3,
+                        help="Number of conversation iterations per prompt")
+    parser.add_argument("--early-stop", type=float, metavar="THRESHOLD",
+                        help="Stop a conversation once responses are this similar (0-1) to the previous iteration")
+    parser.add_argument("-w", "--workers", type=int, default=16,
+                        help="Number of conversations run at once")
+    parser.add_argument("--concurrency", action="append", metavar="PROVIDER=N",
+                        help="Max in-flight calls for a provider, e.g. openai=8")
+    parser.add_argument("--rate", action="append", metavar="PROVIDER=PER_SEC",
+                        help="Max calls per second for a provider, e.g. anthropic=2.5")
+    parser.add_argument("--metrics-port", type=int,
+                        help="Serve Prometheus metrics for model calls on this port")
+    parser.add_argument("--metrics-json",
+                        help="Write a JSON snapshot of model call metrics to this file every minute")
+
+    args = parser.parse_args()
+
+    metrics = ModelMetrics() if args.metrics_port or args.metrics_json else None
+    if args.metrics_port:
+        metrics.serve(args.metrics_port)
+    if args.metrics_json:
+        metrics.dump_periodically(args.metrics_json)
+
+    client = LimitedModelClient(
+        ModelClient(metrics),
+        concurrency=_parse_limits(args.concurrency, int),
+        rates=_parse_limits(args.rate, float),
+    )
+    run_batch(args.input, args.output, client, workers=args.workers, iterations=args.iterations,
+              early_stop_threshold=args.early_stop)
+
+    if args.metrics_json:
+        metrics.dump(args.metrics_json)
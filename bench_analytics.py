@@ -0,0 +1,230 @@
+"""Offline benchmarks for the analytics functions.
+
+Generates synthetic OHLCV and fundamentals data, times each function (best of
+several runs) and measures its peak allocation with tracemalloc, writes the
+results as JSON, and optionally fails when a result regresses against a
+baseline file by more than a threshold.
+
+    python bench_analytics.py -o bench_baseline.json            # record a baseline
+    python bench_analytics.py --baseline bench_baseline.json    # compare against it
+"""
+import contextlib
+import gc
+import io
+import json
+import platform
+import socket
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+# (rows per series, tickers) to run for each profile
+PROFILES = {
+    'quick': {'rows': [1000, 100000], 'tickers': [10, 1000]},
+    'full': {'rows': [1000, 100000, 1000000, 10000000], 'tickers': [10, 100, 1000, 10000]},
+}
+
+# Results faster than this are too noisy to compare
+MIN_COMPARABLE_SECONDS = 0.005
+# Fast cases keep running (up to 100 times) until this much time is spent, so the best run is stable
+MIN_TOTAL_SECONDS = 1.0
+
+
+def _daily_index(rows):
+    """Consecutive daily dates; second resolution so 10M rows doesn't overflow datetime64[ns]"""
+    dates = np.datetime64('1980-01-01', 's') + np.arange(rows).astype('timedelta64[D]')
+    return pd.DatetimeIndex(dates, name='Date')
+
+
+def synthetic_ohlcv(rows, seed=0):
+    """One index's daily bars as a random walk, shaped like yf.download output"""
+    rng = np.random.default_rng(seed)
+    # Random walk pinned back to the start every ~10 years (a Brownian bridge per
+    # segment), so prices stay realistic over millions of rows instead of overflowing
+    segment = 2520
+    segments = -(-rows // segment)
+    walk = np.cumsum(rng.normal(0, 0.01, (segments, segment)), axis=1)
+    walk -= walk[:, -1:] * np.linspace(0, 1, segment)
+    close = 1000 * np.exp(walk.ravel()[:rows])
+    spread = np.abs(rng.normal(0, 0.005, rows)) * close
+    return pd.DataFrame({
+        'Open': close * (1 + rng.normal(0, 0.002, rows)),
+        'High': close + spread,
+        'Low': close - spread,
+        'Close': close,
+        'Adj Close': close,
+        'Volume': rng.integers(1000000, 5000000, rows).astype(float),
+    }, index=_daily_index(rows))
+
+
+def synthetic_stacked(rows, tickers, seed=0):
+    """`rows` bars in total split across `tickers` symbols, stacked like track_indices output"""
+    per_symbol = max(1, rows // tickers)
+    frames = []
+    for i in range(tickers):
+        frame = synthetic_ohlcv(per_symbol, seed + i)
+        frame['Index'] = f'SYM{i}'
+        frames.append(frame)
+    return pd.concat(frames)
+
+
+def synthetic_fundamentals(tickers, seed=0):
+    """Fundamentals frame with the columns StockAnalyzer.score_stocks expects, ~5% missing"""
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        'ticker': [f'T{i}' for i in range(tickers)],
+        'revenue_growth': rng.normal(0.08, 0.1, tickers),
+        'profit_margin': rng.normal(0.15, 0.08, tickers),
+        'pe_ratio': rng.lognormal(3, 0.5, tickers),
+        'debt_to_equity': rng.lognormal(4, 0.7, tickers),
+        'dividend_yield': np.abs(rng.normal(1.5, 1.0, tickers)),
+        'market_cap': rng.lognormal(24, 1.5, tickers),
+        'industry': rng.choice(['Tech', 'Health', 'Energy', 'Finance'], tickers),
+        'rsi': rng.uniform(10, 90, tickers),
+        'esg': rng.uniform(0, 100, tickers),
+    })
+    df.loc[rng.random(tickers) < 0.05, 'esg'] = np.nan
+    return df
+
+
+def build_cases(profile):
+    """List of (case id, setup, function); setup builds the input, function takes it"""
+    import ai_index
+    import ai_index_deepseek
+    import aistocks
+    import aistocks2
+
+    analyzer = aistocks.StockAnalyzer()
+    cases = []
+    for rows in PROFILES[profile]['rows']:
+        ohlcv = lambda rows=rows: synthetic_ohlcv(rows)
+        cases += [
+            (f'ai_index.calculate_rsi/rows={rows}', ohlcv, ai_index.calculate_rsi),
+            (f'ai_index.calculate_moving_average/rows={rows}', ohlcv, ai_index.calculate_moving_average),
+            (f'ai_index_deepseek.calculate_technical_indicators/rows={rows}', ohlcv,
+             ai_index_deepseek.calculate_technical_indicators),
+            (f'ai_index_deepseek.calculate_score/rows={rows}',
+             lambda rows=rows: ai_index_deepseek.calculate_technical_indicators(synthetic_ohlcv(rows)).dropna(),
+             ai_index_deepseek.calculate_score),
+        ]
+    for tickers in PROFILES[profile]['tickers']:
+        cases.append((f'aistocks.StockAnalyzer.score_stocks/tickers={tickers}',
+                      lambda tickers=tickers: synthetic_fundamentals(tickers), analyzer.score_stocks))
+        for rows in PROFILES[profile]['rows']:
+            if rows >= tickers:
+                cases.append((f'aistocks2.calculate_returns/rows={rows},tickers={tickers}',
+                              lambda rows=rows, tickers=tickers: synthetic_stacked(rows, tickers),
+                              aistocks2.calculate_returns))
+    return cases
+
+
+def _block_network():
+    """Make any accidental download fail loudly instead of skewing the timings"""
+    def refuse(*args, **kwargs):
+        raise RuntimeError("bench_analytics must run offline")
+    socket.socket.connect = refuse
+    socket.create_connection = refuse
+
+
+def run_case(setup, func, repeat):
+    """Return (best seconds, peak MB); every run gets a fresh copy since the functions mutate their input"""
+    data = setup()
+    best = None
+    runs = 0
+    total = 0.0
+    with contextlib.redirect_stdout(io.StringIO()):
+        while runs < repeat or (total < MIN_TOTAL_SECONDS and runs < 100):
+            arg = data.copy()
+            gc.collect()
+            gc.disable()  # As timeit does, so a collection doesn't land in one run
+            try:
+                start = time.perf_counter()
+                func(arg)
+                elapsed = time.perf_counter() - start
+            finally:
+                gc.enable()
+            best = elapsed if best is None else min(best, elapsed)
+            runs += 1
+            total += elapsed
+
+        # Separate run for memory, as tracemalloc slows allocation-heavy code down
+        arg = data.copy()
+        tracemalloc.start()
+        func(arg)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return best, peak / 1e6
+
+
+def compare(results, baseline, threshold):
+    """List of regression messages for results slower or bigger than baseline by more than threshold"""
+    failures = []
+    for case, base in baseline['results'].items():
+        current = results.get(case)
+        if current is None:
+            continue
+        if (base['seconds'] >= MIN_COMPARABLE_SECONDS
+                and current['seconds'] > base['seconds'] * (1 + threshold)):
+            failures.append(f"{case}: {current['seconds'] * 1000:.1f} ms vs baseline "
+                            f"{base['seconds'] * 1000:.1f} ms")
+        if current['peak_mb'] > base['peak_mb'] * (1 + threshold) + 0.1:
+            failures.append(f"{case}: peak {current['peak_mb']:.1f} MB vs baseline {base['peak_mb']:.1f} MB")
+    return failures
+
+
+def main(profile='quick', output='bench_results.json', baseline_path=None, threshold=0.25,
+         repeat=5, match=None):
+    _block_network()
+    results = {}
+    for case, setup, func in build_cases(profile):
+        if match and match not in case:
+            continue
+        seconds, peak_mb = run_case(setup, func, repeat)
+        results[case] = {'seconds': seconds, 'peak_mb': peak_mb}
+        print(f"{case:<70} {seconds * 1000:10.2f} ms {peak_mb:10.1f} MB")
+
+    report = {
+        'meta': {
+            'profile': profile,
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+            'machine': platform.machine(),
+        },
+        'results': results,
+    }
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {output}")
+
+    if baseline_path:
+        with open(baseline_path) as f:
+            baseline = json.load(f)
+        failures = compare(results, baseline, threshold)
+        if failures:
+            print(f"\nREGRESSIONS (threshold {threshold:.0%}):")
+            for failure in failures:
+                print(f"  {failure}")
+            return 1
+        print(f"No regressions against {baseline_path} (threshold {threshold:.0%})")
+    return 0
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark the analytics functions on synthetic data")
+    parser.add_argument('--profile', choices=sorted(PROFILES), default='quick',
+                        help="quick: up to 100k rows / 1k tickers; full: up to 10M rows / 10k tickers")
+    parser.add_argument('-o', '--output', default='bench_results.json')
+    parser.add_argument('--baseline', help="Results JSON to compare against")
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help="Allowed slowdown / memory growth as a fraction (default 0.25)")
+    parser.add_argument('--repeat', type=int, default=5, help="Minimum timed runs per case; the best is kept")
+    parser.add_argument('-k', '--match', help="Only run cases whose id contains this string")
+    args = parser.parse_args()
+
+    sys.exit(main(args.profile, args.output, args.baseline, args.threshold, args.repeat, args.match))
@@ -0,0 +1,82 @@
+import os
+import re
+import subprocess
+import sys
+import time
+
+CLI = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cli.py')
+
+# Commands that must start fast, and the modules they must not import
+LIGHT_COMMANDS = [
+    ['--help'],
+    ['rank-indices', '--help'],
+    ['screen-stocks', '--help'],
+    ['scrape-universe', '--help'],
+    ['export', '--help'],
+]
+HEAVY_MODULES = ['yfinance', 'pandas', 'numpy', 'matplotlib', 'sklearn', 'pypfopt', 'bs4', 'requests']
+
+IMPORTTIME_RE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)')
+
+
+def measure(command, runs=5):
+    """Run cli.py with -X importtime.
+
+    Returns (best wall seconds, {top-level import: cumulative us}, every module imported).
+    """
+    best = None
+    imports = {}
+    modules = set()
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = subprocess.run([sys.executable, '-X', 'importtime', CLI] + command,
+                                capture_output=True, text=True)
+        elapsed = time.perf_counter() - start
+        if result.returncode != 0:
+            raise RuntimeError(f"cli.py {' '.join(command)} failed:\n{result.stderr}")
+        if best is None or elapsed < best:
+            best = elapsed
+            imports = {}
+            modules = set()
+            for line in result.stderr.splitlines():
+                match = IMPORTTIME_RE.match(line)
+                if match:
+                    modules.add(match.group(4))
+                    if len(match.group(3)) == 1:  # Top-level import
+                        imports[match.group(4)] = int(match.group(2))
+    return best, imports, modules
+
+
+def main(budget, runs):
+    failures = []
+    for command in LIGHT_COMMANDS:
+        elapsed, imports, modules = measure(command, runs)
+        # Any depth, since heavy packages usually arrive through another import
+        packages = {module.split('.')[0] for module in modules}
+        heavy = [module for module in HEAVY_MODULES if module in packages]
+        slowest = sorted(imports.items(), key=lambda item: item[1], reverse=True)[:3]
+        print(f"cli.py {' '.join(command):<28} {elapsed * 1000:7.1f} ms  "
+              f"slowest imports: {', '.join(f'{m} {us / 1000:.1f}ms' for m, us in slowest)}")
+        if elapsed > budget:
+            failures.append(f"{' '.join(command)} took {elapsed:.3f}s (budget {budget:.3f}s)")
+        if heavy:
+            failures.append(f"{' '.join(command)} imported heavy modules: {', '.join(heavy)}")
+
+    if failures:
+        print("\nFAILED:")
+        for failure in failures:
+            print(f"  {failure}")
+        return 1
+    print(f"\nAll light commands within {budget * 1000:.0f} ms budget")
+    return 0
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Check cli.py startup time with -X importtime")
+    parser.add_argument('--budget', type=float, default=0.5, help="Max seconds per light command")
+    parser.add_argument('--runs', type=int, default=5, help="Runs per command; the best is kept")
+    args = parser.parse_args()
+
+    sys.exit(main(args.budget, args.runs))
@@ -0,0 +1,223 @@
+import csv
+import io
+import re
+import threading
+import time
+import uuid
+
+from flask import Blueprint, request, jsonify
+from requests.adapters import HTTPAdapter
+from twilio.http.http_client import TwilioHttpClient
+
+from rate_limiter import RateLimiter
+
+# E.164: '+', country code, up to 15 digits in total
+E164_RE = re.compile(r'^\+[1-9]\d{7,14}$')
+# Spaces, dashes, dots and brackets people put in phone numbers
+FORMATTING_RE = re.compile(r'[\s\-().]')
+
+# Only the first failures are kept per broadcast so a bad list can't eat memory
+MAX_RECORDED_FAILURES = 1000
+# Finished broadcasts stay queryable for this many seconds
+DEFAULT_RETENTION = 3600
+
+
+def pooled_http_client(pool_size):
+    """Twilio HTTP client reusing up to pool_size keep-alive connections"""
+    http_client = TwilioHttpClient(pool_connections=True)
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+    http_client.session.mount('https://', adapter)
+    http_client.session.mount('http://', adapter)
+    return http_client
+
+
+def normalize_numbers(raw_numbers):
+    """Validate and deduplicate phone numbers, keeping first-seen order.
+
+    Returns (valid, invalid). Formatting characters are stripped and a leading
+    '00' international prefix becomes '+'.
+    """
+    seen = set()
+    valid = []
+    invalid = []
+    for raw in raw_numbers:
+        number = FORMATTING_RE.sub('', str(raw))
+        if number.startswith('00'):
+            number = '+' + number[2:]
+        if not E164_RE.match(number):
+            invalid.append(raw)
+        elif number not in seen:
+            seen.add(number)
+            valid.append(number)
+    return valid, invalid
+
+
+def iter_csv_numbers(stream):
+    """Yield phone numbers from a CSV byte stream without reading it all into memory.
+
+    Uses the 'user_number' or 'number' column when there is a header row,
+    otherwise the first column.
+    """
+    reader = csv.reader(io.TextIOWrapper(stream, encoding='utf-8', newline=''))
+    column = 0
+    for i, row in enumerate(reader):
+        if not row:
+            continue
+        if i == 0:
+            header = [cell.strip().lower() for cell in row]
+            for name in ('user_number', 'number'):
+                if name in header:
+                    column = header.index(name)
+                    break
+            if not any(ch.isdigit() for ch in row[column]):
+                continue  # Header row
+        if column < len(row):
+            yield row[column]
+
+
+class Broadcast:
+    """Progress of a single broadcast"""
+
+    def __init__(self, body, numbers, invalid):
+        self.id = uuid.uuid4().hex
+        self.body = body
+        self.numbers = numbers  # Dropped once the run finishes
+        self.total = len(numbers)
+        self.invalid = len(invalid)
+        self.sent = 0
+        self.failed = 0
+        self.failures = []
+        self.status = 'running'
+        self.started_at = time.time()
+        self.finished_at = None
+        self.lock = threading.Lock()
+
+    def to_dict(self):
+        with self.lock:
+            elapsed = (self.finished_at or time.time()) - self.started_at
+            done = self.sent + self.failed
+            return {
+                "broadcast_id": self.id,
+                "status": self.status,
+                "total": self.total,
+                "sent": self.sent,
+                "failed": self.failed,
+                "pending": self.total - done,
+                "invalid": self.invalid,
+                "messages_per_sec": round(done / elapsed, 2) if elapsed else 0.0,
+                "failures": list(self.failures),
+            }
+
+
+class Broadcaster:
+    """Fan a message out to many numbers on a worker pool under a messages/sec limit.
+
+    The limit is shared by every broadcast running at once, since it stands for
+    the account's sending ceiling. Finished broadcasts are forgotten
+    `retention` seconds after they end.
+    """
+
+    def __init__(self, send, rate=50, workers=16, retention=DEFAULT_RETENTION):
+        self.send = send  # send(number, body)
+        self.rate = rate
+        self.workers = workers
+        self.retention = retention
+        self.limiter = RateLimiter(rate, burst=workers)
+        self.broadcasts = {}
+        self.lock = threading.Lock()
+
+    def start(self, body, numbers, invalid=()):
+        """Start delivering in the background and return the Broadcast for progress"""
+        broadcast = Broadcast(body, numbers, invalid)
+        with self.lock:
+            self._evict()
+            self.broadcasts[broadcast.id] = broadcast
+        threading.Thread(target=self._run, args=(broadcast,), daemon=True).start()
+        return broadcast
+
+    def get(self, broadcast_id):
+        """The Broadcast with this id, or None if unknown or expired"""
+        with self.lock:
+            self._evict()
+            return self.broadcasts.get(broadcast_id)
+
+    def _evict(self):
+        cutoff = time.time() - self.retention
+        expired = [broadcast_id for broadcast_id, broadcast in self.broadcasts.items()
+                   if broadcast.finished_at is not None and broadcast.finished_at < cutoff]
+        for broadcast_id in expired:
+            del self.broadcasts[broadcast_id]
+
+    def _run(self, broadcast):
+        remaining = iter(broadcast.numbers)
+        iter_lock = threading.Lock()
+
+        def worker():
+            while True:
+                with iter_lock:
+                    number = next(remaining, None)
+                if number is None:
+                    return
+                self.limiter.acquire()
+                try:
+                    self.send(number, broadcast.body)
+                    with broadcast.lock:
+                        broadcast.sent += 1
+                except Exception as e:
+                    with broadcast.lock:
+                        broadcast.failed += 1
+                        if len(broadcast.failures) < MAX_RECORDED_FAILURES:
+                            broadcast.failures.append({"number": number, "error": str(e)})
+
+        threads = [threading.Thread(target=worker, daemon=True) for _ in range(self.workers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        with broadcast.lock:
+            broadcast.status = 'finished'
+            broadcast.finished_at = time.time()
+            broadcast.numbers = None
+
+
+def broadcast_blueprint(broadcaster, default_body=None):
+    """Blueprint with POST /broadcast and GET /broadcast/<id>.
+
+    POST accepts JSON {"message": ..., "recipients": [...]} or a CSV body
+    (Content-Type: text/csv) with the message in the `message` query parameter.
+    `default_body()` supplies the message when none is given.
+    """
+    bp = Blueprint('broadcast', __name__)
+
+    @bp.route('/broadcast', methods=['POST'])
+    def start_broadcast():
+        if request.mimetype == 'text/csv':
+            body = request.args.get('message')
+            raw_numbers = iter_csv_numbers(request.stream)
+        else:
+            data = request.json or {}
+            body = data.get("message")
+            raw_numbers = data.get("recipients", [])
+
+        numbers, invalid = normalize_numbers(raw_numbers)
+        if not numbers:
+            return jsonify({"error": "No valid recipients", "invalid": invalid[:MAX_RECORDED_FAILURES]}), 400
+        if not body:
+            if default_body is None:
+                return jsonify({"error": "Message is required"}), 400
+            body = default_body()
+
+        broadcast = broadcaster.start(body, numbers, invalid)
+        result = broadcast.to_dict()
+        result["invalid_numbers"] = invalid[:MAX_RECORDED_FAILURES]
+        return jsonify(result), 202
+
+    @bp.route('/broadcast/<broadcast_id>', methods=['GET'])
+    def broadcast_status(broadcast_id):
+        broadcast = broadcaster.get(broadcast_id)
+        if broadcast is None:
+            return jsonify({"error": "Unknown broadcast id"}), 404
+        return jsonify(broadcast.to_dict())
+
+    return bp
@@ -0,0 +1,105 @@
+"""Single entry point for the market analysis scripts.
+
+Heavy dependencies (yfinance, pandas, matplotlib, sklearn, pypfopt) are only
+imported inside the subcommand that needs them, so `--help` starts instantly.
+Run bench_startup.py to check startup time stays within budget.
+"""
+import argparse
+import importlib
+
+
+def make_tracer(args):
+    """profiling.Tracer when --trace was given, else the no-op tracer"""
+    from profiling import NULL_TRACER, Tracer
+    if not args.trace:
+        return NULL_TRACER
+    return Tracer(profile=args.profile, memory=args.trace_memory)
+
+
+def finish_trace(args, tracer):
+    if tracer.enabled:
+        tracer.write_chrome_trace(args.trace)
+        print(tracer.summary())
+
+
+def rank_indices(args):
+    if args.engine == 'simple':
+        from ai_index import suggest_best_indices
+        suggest_best_indices(args.report)
+    else:
+        from ai_index_deepseek import analyze_indices
+        tracer = make_tracer(args)
+        analyze_indices(args.report, args.diversify, tracer)
+        finish_trace(args, tracer)
+
+
+def screen_stocks(args):
+    from aistocks import main
+    tracer = make_tracer(args)
+    main(tracer)
+    finish_trace(args, tracer)
+
+
+def add_trace_arguments(parser):
+    parser.add_argument('--trace', metavar='FILE',
+                        help="Record stage and per-ticker timings to a Chrome trace JSON file and print a summary")
+    parser.add_argument('--profile', action='store_true', help="With --trace: cProfile each stage")
+    parser.add_argument('--trace-memory', action='store_true', help="With --trace: tracemalloc peak per stage")
+
+
+def scrape_universe(args):
+    # 'global' is a Python keyword, so the module can't be imported with a plain import statement
+    importlib.import_module('global').main(args.output)
+
+
+def export_indices(args):
+    from aistocks2 import indices, track_indices, calculate_returns, save_data
+    df = track_indices(indices, args.start, args.end)
+    save_data(calculate_returns(df), args.output)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Global market analysis tools")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    rank = sub.add_parser('rank-indices', help="Rank global indices by technical score")
+    rank.add_argument('--engine', choices=['simple', 'deepseek'], default='deepseek',
+                      help="simple: RSI/MA50/volatility (ai_index); deepseek: multi-factor (ai_index_deepseek)")
+    rank.add_argument('--report', metavar='DIR',
+                      help="Write PNG charts and index.html to DIR instead of showing plots")
+    rank.add_argument('--diversify', action='store_true',
+                      help="deepseek engine only: pick the top 5 from different correlation clusters")
+    add_trace_arguments(rank)
+    rank.set_defaults(func=rank_indices)
+
+    screen = sub.add_parser('screen-stocks', help="Score the stock universe and optimise a portfolio")
+    add_trace_arguments(screen)
+    screen.set_defaults(func=screen_stocks)
+
+    scrape = sub.add_parser('scrape-universe', help="Scrape exchange ticker lists from Wikipedia")
+    scrape.add_argument('-o', '--output', default='global_stock_universe.txt')
+    scrape.set_defaults(func=scrape_universe)
+
+    export = sub.add_parser('export', help="Export daily index prices and returns to CSV")
+    export.add_argument('-o', '--output', default='global_index_data.csv')
+    export.add_argument('--start', default='2000-01-01')
+    export.add_argument('--end', default='2025-01-01')
+    export.set_defaults(func=export_indices)
+
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.command == 'rank-indices' and args.engine == 'simple':
+        ignored = [flag for flag, value in (('--diversify', args.diversify), ('--trace', args.trace),
+                                            ('--profile', args.profile), ('--trace-memory', args.trace_memory))
+                   if value]
+        if ignored:
+            parser.error(f"{', '.join(ignored)} only apply to --engine deepseek")
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
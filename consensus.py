@@ -0,0 +1,60 @@
+import re
+import zlib
+import random
+from typing import Dict, List
+
+# Mersenne prime used for the universal hash family
+_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+_WORD_RE = re.compile(r"\w+")
+
+
+class MinHasher:
+    """Estimate Jaccard similarity of texts from MinHash signatures of word shingles"""
+
+    def __init__(self, num_perm: int = 64, shingle_size: int = 3, seed: int = 1):
+        rng = random.Random(seed)
+        self.shingle_size = shingle_size
+        self.params = [(rng.randrange(1, _PRIME), rng.randrange(0, _PRIME)) for _ in range(num_perm)]
+
+    def shingles(self, text: str) -> set:
+        """Return the crc32 hashes of the text's overlapping word n-grams"""
+        words = _WORD_RE.findall(text.lower())
+        k = self.shingle_size
+        if len(words) < k:
+            return {zlib.crc32(" ".join(words).encode())}
+        return {zlib.crc32(" ".join(words[i:i + k]).encode()) for i in range(len(words) - k + 1)}
+
+    def signature(self, text: str) -> List[int]:
+        """Return the MinHash signature of the text"""
+        hashes = self.shingles(text)
+        return [min(((a * h + b) % _PRIME) & _MAX_HASH for h in hashes) for a, b in self.params]
+
+    @staticmethod
+    def similarity(sig_a: List[int], sig_b: List[int]) -> float:
+        """Estimated Jaccard similarity of two signatures"""
+        return sum(a == b for a, b in zip(sig_a, sig_b)) / len(sig_a)
+
+
+class ConsensusTracker:
+    """Track per-model responses across iterations and measure how much they still change"""
+
+    def __init__(self, hasher: MinHasher = None):
+        self.hasher = hasher or MinHasher()
+        self.previous: Dict[str, List[int]] = {}
+
+    def agreement(self, responses: List[Dict]) -> float:
+        """Return the lowest similarity between each model's response and its previous one.
+
+        Returns 0.0 when no model has a previous response to compare against, so the
+        first iteration never counts as converged.
+        """
+        scores = []
+        for entry in responses:
+            signature = self.hasher.signature(entry["response"])
+            previous = self.previous.get(entry["model"])
+            if previous is not None:
+                scores.append(self.hasher.similarity(signature, previous))
+            self.previous[entry["model"]] = signature
+        return min(scores) if scores else 0.0
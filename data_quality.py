@@ -0,0 +1,289 @@
+"""Vectorized price validation for fetched index and stock data.
+
+Every check runs on a dates x symbols array at once (NaN where a symbol has
+no session), so a single frame and a MarketPanel of thousands of symbols go
+through the same code. Returns are taken session to session per symbol.
+
+Checks:
+    jump    |robust z-score| of the log return above z_threshold (median/MAD per symbol)
+    spike   a jump of at least spike_move that reverses on the next session (bad print);
+            smaller reversing pairs such as 2020-03-12/13 (-9.5%, +9.3%) stay plain jumps
+    split   a jump matching a common split ratio that does not reverse (off for
+            indices, which never split)
+    stale   a run of more than stale_run identical consecutive prices
+    gap     more than max_missing weekdays between two sessions
+    bad     non-positive price
+
+Policies:
+    flag    report only (the default; jumps are never rewritten)
+    mask    set spike, stale and bad prices to NaN
+    repair  replace spikes and bad prints with the geometric midpoint of their
+            neighbours and back-adjust prices (and volume) before splits; stale
+            repeats already equal a forward fill, so they are only reported
+"""
+import numpy as np
+import pandas as pd
+
+POLICIES = ('flag', 'mask', 'repair')
+CHECKS = ('jump', 'spike', 'split', 'stale', 'gap', 'bad')
+SPLIT_RATIOS = np.array([1.5, 2, 3, 4, 5, 8, 10, 20])
+PRICE_COLUMNS = ('Open', 'High', 'Low', 'Close', 'Adj Close')
+
+DEFAULT_LIMITS = {
+    'z_threshold': 8.0,
+    'reversal': 0.25,  # A spike's next return undoes all but this fraction of it
+    'spike_move': 0.25,  # Min one-session move (as a fraction) for a reversing jump to count as a bad print
+    'split_tolerance': 0.03,  # Max relative distance of the move from a split ratio
+    'stale_run': 5,  # Flag runs of more than this many identical prices
+    'max_missing': 5,  # Golden Week / Lunar New Year closures are about this long
+}
+
+
+def _last_index(present, strict=False):
+    """Row of the last True at (or, if strict, before) each row, per column; -1 if none"""
+    rows = np.arange(len(present), dtype=np.int32)[:, None]
+    last = np.maximum.accumulate(np.where(present, rows, np.int32(-1)), axis=0)
+    if not strict:
+        return last
+    shifted = np.empty_like(last)
+    shifted[0] = -1
+    shifted[1:] = last[:-1]
+    return shifted
+
+
+def _next_index(present, strict=False):
+    """Row of the first True at (or, if strict, after) each row, per column; len(present) if none"""
+    rows = np.arange(len(present), dtype=np.int32)[:, None]
+    following = np.minimum.accumulate(np.where(present, rows, np.int32(len(present)))[::-1], axis=0)[::-1]
+    if not strict:
+        return following
+    shifted = np.empty_like(following)
+    shifted[-1] = len(present)
+    shifted[:-1] = following[1:]
+    return shifted
+
+
+def _median_and_mad(a):
+    """Column medians and median absolute deviations ignoring NaN, from a single sort.
+
+    Sorting once is much faster than np.nanmedian on wide arrays. The absolute
+    deviations are the values below the median read backwards merged with the
+    values above it read forwards, two sorted runs per column, so their median
+    is found by a bisection over each column's split point instead of a
+    second sort.
+    """
+    ordered = np.sort(a, axis=0)  # NaNs sort last
+    n = (~np.isnan(a)).sum(axis=0)
+    cols = np.arange(a.shape[1])
+
+    def at(rows):
+        return ordered[np.clip(rows, 0, max(len(a) - 1, 0)), cols]
+
+    median = (at((n - 1) // 2) + at(n // 2)) / 2
+    below = (ordered < median).sum(axis=0)  # NaN compares False
+    above = n - below
+
+    def low(i):  # i-th smallest deviation among values below the median
+        return np.where(i < below, median - at(below - 1 - i), np.inf)
+
+    def high(j):  # j-th smallest deviation among values at or above it
+        return np.where(j < above, at(below + j) - median, np.inf)
+
+    # Deviation of rank k = (n - 1) // 2 of the merged runs: bisect on how many
+    # of the k + 1 smallest come from the low run
+    k = np.maximum((n - 1) // 2, 0)
+    lo = np.maximum(k + 1 - above, 0)
+    hi = np.minimum(k + 1, below)
+    while (lo < hi).any():
+        mid = (lo + hi) // 2
+        take_more = (lo < hi) & (low(mid) < high(k - mid))
+        lo, hi = np.where(take_more, mid + 1, lo), np.where(take_more | (lo >= hi), hi, mid)
+    j = k + 1 - lo
+    with np.errstate(invalid='ignore'):
+        kth = np.maximum(np.where(lo > 0, low(lo - 1), -np.inf), np.where(j > 0, high(j - 1), -np.inf))
+        following = np.minimum(low(lo), high(j))
+    mad = np.where(n % 2 == 1, kth, (kth + following) / 2)
+    median[n == 0] = np.nan
+    mad[n == 0] = np.nan
+    return median, mad
+
+
+def _session_returns(prices):
+    """(log returns vs each symbol's previous session, previous session row, next session row)"""
+    present = ~np.isnan(prices)
+    logs = np.full(prices.shape, np.nan)
+    np.log(prices, out=logs, where=prices > 0)
+    previous = _last_index(present, strict=True)
+    following = _next_index(present, strict=True)
+    returns = logs - np.take_along_axis(logs, np.maximum(previous, 0), axis=0)
+    returns[0] = np.nan  # Rows with no previous session are already NaN except the first
+    return returns, previous, following
+
+
+def check_prices(prices, dates, splits=True, **limits):
+    """Boolean (dates, symbols) masks for each check in CHECKS.
+
+    prices is a float array with NaN where a symbol had no session; dates
+    are the row dates (anything np.datetime64 accepts). splits is a bool, or
+    one bool per symbol, saying whether split detection applies.
+    """
+    limits = {**DEFAULT_LIMITS, **limits}
+    prices = np.asarray(prices, dtype=float)
+    present = ~np.isnan(prices)
+    returns, previous, following = _session_returns(prices)
+    height = len(prices)
+
+    median, mad = _median_and_mad(returns)
+    # |robust z| > z_threshold, without dividing the whole array
+    limit = limits['z_threshold'] * 1.4826 * np.where(mad > 0, mad, np.inf)
+    with np.errstate(invalid='ignore'):
+        jump = np.abs(returns - median) > limit
+
+    # Jumps are rare, so the spike and split tests only look at those cells
+    spike = np.zeros_like(jump)
+    split = np.zeros_like(jump)
+    rows, cols = np.nonzero(jump)
+    later = following[rows, cols]
+    has_next = later < height
+    next_return = np.full(len(rows), np.nan)
+    next_return[has_next] = returns[later[has_next], cols[has_next]]
+    jump_return = returns[rows, cols]
+    reverses = ((np.abs(jump_return + next_return) <= limits['reversal'] * np.abs(jump_return))
+                & (np.abs(jump_return) >= np.log1p(limits['spike_move'])))
+    spike[rows[reverses], cols[reverses]] = True
+    # The session after a spike moves back by the same ratio; that is not a split
+    after_spike = np.zeros_like(jump)
+    after_spike[later[reverses & has_next], cols[reverses & has_next]] = True
+    distance = np.abs(np.abs(jump_return)[:, None] - np.log(SPLIT_RATIOS)).min(axis=1)
+    matches = ~reverses & (distance < np.log1p(limits['split_tolerance']))
+    split[rows[matches], cols[matches]] = True
+    split &= ~after_spike & np.asarray(splits, dtype=bool)
+
+    # Stale: runs of prices equal to the previous session; non-session rows don't break a run
+    repeat = present & (previous >= 0) & (
+        prices == np.take_along_axis(prices, np.maximum(previous, 0), axis=0))
+    stale = np.zeros_like(repeat)
+    if repeat.any():
+        breaks = present & ~repeat
+        counts = np.zeros((height + 1, prices.shape[1]), dtype=np.int32)
+        np.cumsum(repeat, axis=0, out=counts[1:])
+        run_start = _last_index(breaks) + 1
+        run_end = _next_index(breaks, strict=True)
+        run_length = np.take_along_axis(counts, run_end, axis=0) - np.take_along_axis(counts, run_start, axis=0)
+        # run_length counts repeats, one fewer than the identical prices in the run
+        stale = repeat & (run_length >= limits['stale_run'])
+
+    # Weekday ordinal of each row's date, so missing weekdays are a subtraction
+    days = np.asarray(dates, dtype='datetime64[D]')
+    weekday = np.busday_count(days[0], days) if len(days) else np.zeros(0, dtype=np.int64)
+    missing = weekday[:, None] - weekday[np.maximum(previous, 0)] - 1
+    gap = (missing > limits['max_missing']) & present & (previous >= 0)
+
+    bad = present & ~(prices > 0)
+    return {'jump': jump, 'spike': spike, 'split': split, 'stale': stale, 'gap': gap, 'bad': bad}
+
+
+def apply_policy(columns, prices, flags, policy='flag', volume=None):
+    """Apply policy to a dict of (dates, symbols) price arrays in place; return the changed-cell mask.
+
+    prices is the array the flags were computed from; volume, if given, is
+    scaled to match split back-adjustment.
+    """
+    if policy not in POLICIES:
+        raise ValueError(f"Unknown data quality policy {policy!r}; expected one of {POLICIES}")
+    changed = np.zeros_like(flags['bad'])
+    if policy == 'flag':
+        return changed
+
+    if policy == 'mask':
+        changed = flags['spike'] | flags['stale'] | flags['bad']
+        for values in columns.values():
+            values[changed] = np.nan
+        return changed
+
+    fix = flags['spike'] | flags['bad']
+    if not (fix.any() or flags['split'].any()):
+        return changed
+    returns, previous, following = _session_returns(prices)
+    height = len(prices)
+
+    # Splits: scale everything before each split by the matched ratio
+    if flags['split'].any():
+        rows, cols = np.nonzero(flags['split'])
+        moves = returns[rows, cols]
+        ratio = SPLIT_RATIOS[np.abs(np.abs(moves)[:, None] - np.log(SPLIT_RATIOS)).argmin(axis=1)]
+        factor = np.ones_like(prices)
+        factor[rows, cols] = np.where(moves < 0, 1 / ratio, ratio)
+        after = np.cumprod(factor[::-1], axis=0)[::-1]  # Product of factors at or after each row
+        adjustment = after / factor  # Product of factors strictly after each row
+        for values in columns.values():
+            values *= adjustment
+        if volume is not None:
+            volume /= adjustment
+        changed |= adjustment != 1.0
+
+    # Spikes and bad prints: geometric midpoint of the neighbouring sessions
+    if fix.any():
+        rows, cols = np.nonzero(fix)
+        before = previous[rows, cols]
+        later = following[rows, cols]
+        usable = (before >= 0) & (later < height)
+        rows, cols, before, later = rows[usable], cols[usable], before[usable], later[usable]
+        for values in columns.values():
+            with np.errstate(invalid='ignore'):
+                values[rows, cols] = np.sqrt(values[before, cols] * values[later, cols])
+        changed[rows, cols] = True
+    return changed
+
+
+def quality_report(flags, symbols, present, changed=None):
+    """One row per symbol: session count, count of each check, and cells changed by the policy"""
+    report = pd.DataFrame({'sessions': present.sum(axis=0)}, index=pd.Index(symbols, name='symbol'))
+    for check in CHECKS:
+        report[check] = flags[check].sum(axis=0)
+    report['changed'] = 0 if changed is None else changed.sum(axis=0)
+    return report
+
+
+def format_report(report):
+    """Compact lines for symbols with any issue, e.g. '^GSPC: 2 jump, 2 spike (2 changed of 1250 sessions)'"""
+    lines = []
+    for symbol, row in report.iterrows():
+        issues = [f"{row[check]} {check}" for check in CHECKS if row[check]]
+        if issues:
+            lines.append(f"{symbol}: {', '.join(issues)} ({row['changed']} changed of {row['sessions']} sessions)")
+    return lines
+
+
+def validate_panel(panel, field='Close', policy='flag', splits=True, **limits):
+    """Check a MarketPanel on `field`, apply policy to all its price fields, return the report"""
+    prices = panel.values[field].copy()
+    flags = check_prices(prices, panel.dates, splits, **limits)
+    columns = {name: values for name, values in panel.values.items() if name in PRICE_COLUMNS}
+    changed = apply_policy(columns, prices, flags, policy, panel.values.get('Volume'))
+    return quality_report(flags, panel.symbols, panel.valid, changed)
+
+
+def _column(data, name):
+    # yfinance may return (Price, Ticker) MultiIndex columns, making data[name] a one-column frame
+    return np.asarray(data[name], dtype=float).reshape(len(data), -1)[:, :1].copy()
+
+
+def validate_frame(data, symbol, policy='flag', price_column='Close', splits=None, **limits):
+    """Validate one downloaded price frame; returns (data, one-row report).
+
+    By default split detection is off for Yahoo index symbols ('^GSPC', ...).
+    """
+    if splits is None:
+        splits = not symbol.startswith('^')
+    prices = _column(data, price_column)
+    flags = check_prices(prices, data.index.values, splits, **limits)
+    columns = {name: _column(data, name) for name in PRICE_COLUMNS if name in data}
+    volume = _column(data, 'Volume') if 'Volume' in data else None
+    changed = apply_policy(columns, prices, flags, policy, volume)
+    if changed.any():
+        if volume is not None:
+            columns['Volume'] = volume
+        for name, values in columns.items():
+            data[name] = values if isinstance(data[name], pd.DataFrame) else values[:, 0]
+    return data, quality_report(flags, [symbol], ~np.isnan(prices), changed)
@@ -0,0 +1,299 @@
+import hashlib
+import math
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from flask import Blueprint, request, jsonify
+
+# Twilio message statuses in the order they can happen; a late callback for an
+# earlier status must not overwrite a later one.
+STATUS_RANK = {
+    'accepted': 0, 'scheduled': 0, 'queued': 1, 'sending': 2, 'sent': 3,
+    'receiving': 3, 'received': 4, 'delivered': 4, 'undelivered': 4,
+    'failed': 4, 'read': 5, 'canceled': 5,
+}
+
+
+def _connect(path):
+    conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter: no false negatives, ~`error_rate` false positives"""
+
+    def __init__(self, capacity=1000000, error_rate=0.01):
+        self.size = int(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key):
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, key):
+        for pos in self._positions(key):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, key):
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+
+class IdempotencyStore:
+    """Remember which idempotency keys have already produced a send.
+
+    An LRU of recent keys answers retries in memory, and a Bloom filter over
+    the live keys lets brand-new keys skip the database lookup entirely; only
+    Bloom false positives and older duplicates reach SQLite. Keys expire after
+    `ttl` seconds: expired rows are pruned, and the Bloom filter rebuilt and
+    resized for the keys left, hourly or whenever it fills up. The rebuild runs
+    on a background thread with its own connection and the new filter is
+    swapped in when ready, so claims never wait for it.
+    """
+
+    def __init__(self, path, recent_size=100000, ttl=7 * 86400, min_capacity=100000):
+        self.path = path
+        self.conn = _connect(path)
+        self.lock = threading.Lock()
+        self.recent = OrderedDict()  # key -> (job_id, created_at)
+        self.recent_size = recent_size
+        self.ttl = ttl
+        self.min_capacity = min_capacity
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS idempotency_keys (
+                key TEXT PRIMARY KEY,
+                job_id TEXT NOT NULL,
+                created_at REAL NOT NULL
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idempotency_keys_created ON idempotency_keys (created_at)")
+        self.pruning = False
+        self.claimed_while_pruning = []  # Keys the filter being built may have missed
+        self._install(*self._build_filter(self.conn))
+
+    def _build_filter(self, conn):
+        """Delete expired keys; return (Bloom filter of the live ones, its capacity, key count)"""
+        conn.execute("DELETE FROM idempotency_keys WHERE created_at < ?", (time.time() - self.ttl,))
+        keys = [key for (key,) in conn.execute("SELECT key FROM idempotency_keys")]
+        capacity = max(self.min_capacity, 2 * len(keys))
+        bloom = BloomFilter(capacity)
+        for key in keys:
+            bloom.add(key)
+        return bloom, capacity, len(keys)
+
+    def _install(self, bloom, capacity, count):
+        """Swap in a new filter; caller must hold self.lock (or still be in __init__)"""
+        for key in self.claimed_while_pruning:
+            bloom.add(key)
+        self.bloom = bloom
+        self.capacity = capacity
+        self.bloom_count = count + len(self.claimed_while_pruning)
+        self.claimed_while_pruning = []
+        self.next_prune = time.time() + min(self.ttl, 3600)
+
+    def _prune(self):
+        conn = _connect(self.path)
+        try:
+            built = self._build_filter(conn)
+        except Exception as e:
+            print(f"Idempotency key prune error: {e}")
+            built = None
+        finally:
+            conn.close()
+        with self.lock:
+            if built is not None:
+                self._install(*built)
+            else:
+                self.claimed_while_pruning = []
+                self.next_prune = time.time() + 60  # Try again soon
+            self.pruning = False
+
+    def claim(self, key, job_id):
+        """Store key -> job_id and return None, or return the job id that already owns key"""
+        with self.lock:
+            now = time.time()
+            if not self.pruning and (now >= self.next_prune or self.bloom_count >= self.capacity):
+                self.pruning = True
+                threading.Thread(target=self._prune, name="idempotency-prune", daemon=True).start()
+            cutoff = now - self.ttl
+
+            entry = self.recent.get(key)
+            if entry is not None and entry[1] >= cutoff:
+                self.recent.move_to_end(key)
+                return entry[0]
+
+            if key in self.bloom:
+                row = self.conn.execute(
+                    "SELECT job_id, created_at FROM idempotency_keys WHERE key = ? AND created_at >= ?",
+                    (key, cutoff)
+                ).fetchone()
+                if row is not None:
+                    self._remember(key, *row)
+                    return row[0]
+
+            # An expired row for the same key is taken over
+            cursor = self.conn.execute("""
+                INSERT INTO idempotency_keys (key, job_id, created_at) VALUES (?, ?, ?)
+                ON CONFLICT (key) DO UPDATE SET job_id = excluded.job_id, created_at = excluded.created_at
+                WHERE idempotency_keys.created_at < ?
+            """, (key, job_id, now, cutoff))
+            if cursor.rowcount == 0:
+                # Another process claimed it between our check and insert
+                row = self.conn.execute(
+                    "SELECT job_id, created_at FROM idempotency_keys WHERE key = ?", (key,)
+                ).fetchone()
+                self._remember(key, *row)
+                return row[0]
+
+            self.bloom.add(key)
+            self.bloom_count += 1
+            if self.pruning:
+                self.claimed_while_pruning.append(key)
+            self._remember(key, job_id, now)
+            return None
+
+    def release(self, key):
+        """Forget key so the send can be retried, e.g. after it failed"""
+        with self.lock:
+            self.recent.pop(key, None)
+            self.conn.execute("DELETE FROM idempotency_keys WHERE key = ?", (key,))
+
+    def _remember(self, key, job_id, created_at):
+        self.recent[key] = (job_id, created_at)
+        if len(self.recent) > self.recent_size:
+            self.recent.popitem(last=False)
+
+
+def enqueue_once(outbox, sends, key, payload):
+    """Enqueue payload unless key was already used; returns (job_id, duplicate)"""
+    job_id = uuid.uuid4().hex
+    if key:
+        existing = sends.claim(key, job_id)
+        if existing is not None:
+            return existing, True
+    try:
+        return outbox.enqueue(payload, job_id), False
+    except Exception:
+        if key:
+            sends.release(key)  # The job was never stored, so a retry must not look like a duplicate
+        raise
+
+
+class StatusBuffer:
+    """Collect Twilio status callbacks in memory and write them to SQLite in batches.
+
+    A background thread flushes every `flush_interval` seconds, or as soon as
+    `flush_size` callbacks are waiting, in a single transaction. Only the most
+    advanced status per message SID is kept.
+    """
+
+    def __init__(self, path, flush_size=1000, flush_interval=1.0):
+        self.conn = _connect(path)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS message_status (
+                sid TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                status_rank INTEGER NOT NULL,
+                error_code TEXT,
+                recipient TEXT,
+                updated_at REAL NOT NULL
+            )
+        """)
+        self.db_lock = threading.Lock()
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.pending = []
+        self.lock = threading.Lock()
+        self.wake = threading.Event()
+        threading.Thread(target=self._flush_loop, name="status-flush", daemon=True).start()
+
+    def add(self, sid, status, error_code=None, recipient=None):
+        """Buffer one status update; cheap enough to call from the request handler"""
+        with self.lock:
+            self.pending.append(
+                (sid, status, STATUS_RANK.get(status, 0), error_code, recipient, time.time())
+            )
+            if len(self.pending) >= self.flush_size:
+                self.wake.set()
+
+    def flush(self):
+        """Write all buffered updates in one transaction and return how many were written"""
+        with self.lock:
+            batch, self.pending = self.pending, []
+        if not batch:
+            return 0
+        with self.db_lock:
+            self.conn.execute("BEGIN")
+            try:
+                self.conn.executemany("""
+                    INSERT INTO message_status (sid, status, status_rank, error_code, recipient, updated_at)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                    ON CONFLICT (sid) DO UPDATE SET
+                        status = excluded.status,
+                        status_rank = excluded.status_rank,
+                        error_code = COALESCE(excluded.error_code, error_code),
+                        recipient = COALESCE(excluded.recipient, recipient),
+                        updated_at = excluded.updated_at
+                    WHERE excluded.status_rank >= message_status.status_rank
+                """, batch)
+                self.conn.execute("COMMIT")
+            except Exception:
+                if self.conn.in_transaction:
+                    self.conn.execute("ROLLBACK")
+                with self.lock:
+                    self.pending[:0] = batch  # Keep the updates for the next flush
+                raise
+        return len(batch)
+
+    def status_for(self, sid):
+        """Latest stored delivery status for a message SID, or None"""
+        if not sid:
+            return None
+        with self.db_lock:
+            row = self.conn.execute(
+                "SELECT status, error_code FROM message_status WHERE sid = ?", (sid,)
+            ).fetchone()
+        return None if row is None else {"status": row[0], "error_code": row[1]}
+
+    def _flush_loop(self):
+        while True:
+            self.wake.wait(self.flush_interval)
+            self.wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"Status flush error: {e}")
+
+
+def status_callback_blueprint(statuses, auth_token=None):
+    """Blueprint with POST /twilio/status for Twilio's statusCallback webhooks.
+
+    When auth_token is given, requests without a valid X-Twilio-Signature are rejected.
+    """
+    bp = Blueprint('twilio_status', __name__)
+    validator = None
+    if auth_token:
+        from twilio.request_validator import RequestValidator
+        validator = RequestValidator(auth_token)
+
+    @bp.route('/twilio/status', methods=['POST'])
+    def twilio_status():
+        form = request.form
+        if validator is not None and not validator.validate(
+                request.url, form.to_dict(), request.headers.get('X-Twilio-Signature', '')):
+            return jsonify({"error": "Invalid signature"}), 403
+        sid = form.get('MessageSid')
+        status = form.get('MessageStatus')
+        if not sid or not status:
+            return jsonify({"error": "MessageSid and MessageStatus are required"}), 400
+        statuses.add(sid, status, form.get('ErrorCode'), form.get('To'))
+        return '', 204
+
+    return bp
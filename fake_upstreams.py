@@ -0,0 +1,140 @@
+import asyncio
+import json
+import random
+import threading
+import time
+import uuid
+from urllib.parse import parse_qs
+
+
+class StubAIClient:
+    """In-process stand-in for DeepSeekAPI with an injectable response delay.
+
+    `delay` is either a number of seconds or a callable returning one per call,
+    e.g. `lambda: random.expovariate(2)` for a long-tailed provider.
+    """
+
+    def __init__(self, delay=0.0, reply="Stub reply to: {message}"):
+        self.delay = delay
+        self.reply = reply
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def get_response(self, message):
+        with self.lock:
+            self.calls += 1
+        time.sleep(self.delay() if callable(self.delay) else self.delay)
+        return self.reply.format(message=message)
+
+
+class FakeUpstreams:
+    """Local stand-in for the Twilio REST API and DeepSeek chat API, for tests and load runs.
+
+    Runs a keep-alive HTTP/1.1 server on its own event loop thread. Point a Twilio
+    client at it by setting `twilio_client.api.base_url = fake.url` (or the
+    TWILIO_API_URL environment variable read by the send_love apps), and the async
+    service's DEEPSEEK_API_URL at the same URL. Every message it accepts is
+    appended to `self.messages`.
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, delay=0.0, fail_rate=0.0):
+        self.host = host
+        self.port = port
+        self.delay = delay
+        self.fail_rate = fail_rate
+        self.messages = []
+        self.loop = None
+        self.server = None
+        self.ready = threading.Event()
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self.port}"
+
+    def start(self):
+        """Start serving on a daemon thread and return self once the port is bound"""
+        threading.Thread(target=self._run, daemon=True).start()
+        self.ready.wait()
+        return self
+
+    def stop(self):
+        if self.loop is not None:
+            self.loop.call_soon_threadsafe(self.loop.stop)
+
+    def _run(self):
+        self.loop = asyncio.new_event_loop()
+        self.server = self.loop.run_until_complete(
+            asyncio.start_server(self._handle, self.host, self.port, backlog=4096)
+        )
+        self.port = self.server.sockets[0].getsockname()[1]
+        self.ready.set()
+        self.loop.run_forever()
+
+    async def _handle(self, reader, writer):
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+                request_line, *header_lines = head.decode("latin-1").split("\r\n")
+                method, path, _ = request_line.split(" ", 2)
+                headers = {}
+                for line in header_lines:
+                    if ":" in line:
+                        name, value = line.split(":", 1)
+                        headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length", 0)))
+
+                status, payload = await self.respond(method, path, headers, body)
+                data = json.dumps(payload).encode()
+                writer.write(
+                    f"HTTP/1.1 {status} {'OK' if status < 400 else 'Error'}\r\n"
+                    f"Content-Type: application/json\r\nContent-Length: {len(data)}\r\n"
+                    f"Connection: keep-alive\r\n\r\n".encode() + data
+                )
+                await writer.drain()
+                if headers.get("connection", "").lower() == "close":
+                    break
+        finally:
+            writer.close()
+
+    async def respond(self, method, path, headers, body):
+        """Return (status, json_payload) for a request"""
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        if self.fail_rate and random.random() < self.fail_rate:
+            return 503, {"code": 20503, "message": "Service unavailable", "status": 503}
+
+        if method == "POST" and path.endswith("/Messages.json"):
+            form = {k: v[0] for k, v in parse_qs(body.decode()).items()}
+            message = {
+                "sid": "SM" + uuid.uuid4().hex,
+                "status": "queued",
+                "to": form.get("To"),
+                "from": form.get("From"),
+                "body": form.get("Body"),
+            }
+            self.messages.append(message)
+            return 201, message
+
+        if method == "POST" and path.endswith("/chat/completions"):
+            prompt = json.loads(body or b"{}").get("messages", [{}])[-1].get("content", "")
+            return 200, {"choices": [{"message": {"role": "assistant", "content": f"Fake reply to: {prompt}"}}]}
+
+        return 404, {"code": 20404, "message": "Not found", "status": 404}
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Fake Twilio and DeepSeek API server")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--delay", type=float, default=0.0, help="Seconds to wait before each response")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="Fraction of requests answered with 503")
+    args = parser.parse_args()
+
+    fake = FakeUpstreams(port=args.port, delay=args.delay, fail_rate=args.fail_rate).start()
+    print(f"Fake upstreams listening on {fake.url}")
+    while True:
+        time.sleep(3600)
@@ -35,7 +35,7 @@ def write_tickers_to_file(tickers, filename):
         for ticker in tickers:
             file.write(f"{ticker}\n")
 
-def main():
+def main(output='global_stock_universe.txt'):
     # List of Wikipedia pages for stock exchanges
     wikipedia_urls = [
         "https://en.wikipedia.org/wiki/List_of_companies_listed_on_the_New_York_Stock_Exchange",
@@ -59,9 +59,9 @@ def main():
     unique_tickers = list(set(all_tickers))
 
     # Write the tickers to a file
-    write_tickers_to_file(unique_tickers, 'global_stock_universe.txt')
+    write_tickers_to_file(unique_tickers, output)
 
-    print(f"Saved {len(unique_tickers)} unique tickers to 'global_stock_universe.txt'")
+    print(f"Saved {len(unique_tickers)} unique tickers to '{output}'")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,139 @@
+import numpy as np
+import pandas as pd
+
+
+class RollingCorrelation:
+    """Rolling pairwise covariance/correlation of daily returns across many symbols.
+
+    Keeps running sums over the last `window` days (pairwise-complete, so a
+    symbol's missing days only drop the pairs they touch). Each `update` adds
+    the new day and removes the one leaving the window in O(n^2), instead of
+    recomputing over the whole window. The sums are rebuilt from the ring
+    buffer once per window to stop floating point drift over decades of data.
+    """
+
+    def __init__(self, symbols, window=252, min_periods=20):
+        self.symbols = list(symbols)
+        self.window = window
+        self.min_periods = min_periods
+        n = len(self.symbols)
+        self.values = np.zeros((window, n))  # Ring buffer of returns, 0 where missing
+        self.valid = np.zeros((window, n))  # 1.0 where the return is present
+        self.count = 0  # Days seen in total
+        self.since_rebuild = 0
+        self.C = np.zeros((n, n))  # Days where both i and j are present
+        self.Sx = np.zeros((n, n))  # Sum of x_i over those days
+        self.Sxx = np.zeros((n, n))  # Sum of x_i^2 over those days
+        self.P = np.zeros((n, n))  # Sum of x_i * x_j over those days
+
+    def _accumulate(self, x, m, sign):
+        self.C += sign * np.outer(m, m)
+        self.Sx += sign * np.outer(x, m)
+        self.Sxx += sign * np.outer(x * x, m)
+        self.P += sign * np.outer(x, x)
+
+    def update(self, returns):
+        """Add one day of returns (array in `symbols` order, NaN where missing)"""
+        returns = np.asarray(returns, dtype=float)
+        m = (~np.isnan(returns)).astype(float)
+        x = np.where(m > 0, returns, 0.0)
+
+        slot = self.count % self.window
+        if self.count >= self.window:
+            self._accumulate(self.values[slot], self.valid[slot], -1)
+        self.values[slot] = x
+        self.valid[slot] = m
+        self._accumulate(x, m, 1)
+        self.count += 1
+
+        self.since_rebuild += 1
+        if self.since_rebuild >= self.window:
+            self.rebuild()
+
+    def rebuild(self):
+        """Recompute the running sums exactly from the ring buffer"""
+        rows = min(self.count, self.window)
+        X = self.values[:rows] if self.count < self.window else self.values
+        M = self.valid[:rows] if self.count < self.window else self.valid
+        self.C = M.T @ M
+        self.Sx = X.T @ M
+        self.Sxx = (X * X).T @ M
+        self.P = X.T @ X
+        self.since_rebuild = 0
+
+    def fit(self, returns):
+        """Load the last `window` rows of a dates x symbols returns array in one step"""
+        returns = np.asarray(returns, dtype=float)[-self.window:]
+        rows = len(returns)
+        self.valid[:] = 0.0
+        self.values[:] = 0.0
+        self.valid[:rows] = ~np.isnan(returns)
+        self.values[:rows] = np.where(self.valid[:rows] > 0, returns, 0.0)
+        self.count = rows
+        self.rebuild()
+        return self
+
+    def cov(self):
+        """Current covariance matrix (NaN for pairs with fewer than min_periods days)"""
+        with np.errstate(divide='ignore', invalid='ignore'):
+            cov = (self.P - self.Sx * self.Sx.T / self.C) / (self.C - 1)
+        cov[self.C < self.min_periods] = np.nan
+        return cov
+
+    def corr(self):
+        """Current correlation matrix (NaN for pairs with fewer than min_periods days)"""
+        with np.errstate(divide='ignore', invalid='ignore'):
+            var = (self.Sxx - self.Sx * self.Sx / self.C) / (self.C - 1)  # var of i over days shared with j
+            corr = (self.P - self.Sx * self.Sx.T / self.C) / (self.C - 1) / np.sqrt(var * var.T)
+        corr[self.C < self.min_periods] = np.nan
+        return np.clip(corr, -1.0, 1.0)
+
+    def corr_frame(self):
+        return pd.DataFrame(self.corr(), index=self.symbols, columns=self.symbols)
+
+
+def returns_panel(results):
+    """Dates x names DataFrame of daily Close returns from analyze_indices-style results"""
+    return pd.concat(
+        {name: data['Close'].pct_change() for name, _, data in results}, axis=1
+    ).sort_index()
+
+
+def cluster_indices(corr, names, max_distance=0.5):
+    """Average-linkage hierarchical clustering on correlation distance sqrt((1 - corr) / 2).
+
+    Returns {name: cluster id}. Pairs with unknown correlation are treated as uncorrelated.
+    """
+    from scipy.cluster.hierarchy import fcluster, linkage
+    from scipy.spatial.distance import squareform
+
+    corr = np.nan_to_num(np.asarray(corr, dtype=float), nan=0.0)
+    np.fill_diagonal(corr, 1.0)
+    distance = np.sqrt(np.clip((1 - corr) / 2, 0, None))
+    if len(names) < 2:
+        return {name: 1 for name in names}
+    tree = linkage(squareform(distance, checks=False), method='average')
+    return dict(zip(names, fcluster(tree, max_distance, criterion='distance').tolist()))
+
+
+def diversified_top_k(ranked_names, clusters, k):
+    """Take the best-ranked name from each cluster until k are picked, then fill by rank"""
+    picks = []
+    used = set()
+    for name in ranked_names:
+        if clusters.get(name) not in used:
+            picks.append(name)
+            used.add(clusters.get(name))
+        if len(picks) == k:
+            return picks
+    return picks + [name for name in ranked_names if name not in picks][:k - len(picks)]
+
+
+def diversify_results(results, k=5, window=252, max_distance=0.5):
+    """Reorder score-sorted (name, score, data) results so the first k come from different clusters"""
+    panel = returns_panel(results)
+    rolling = RollingCorrelation(panel.columns, window=window).fit(panel.values)
+    clusters = cluster_indices(rolling.corr(), list(panel.columns), max_distance)
+    picks = diversified_top_k([name for name, _, _ in results], clusters, k)
+    by_name = {result[0]: result for result in results}
+    return [by_name[name] for name in picks] + [r for r in results if r[0] not in picks]
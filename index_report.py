@@ -0,0 +1,109 @@
+import html
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+# Points kept per series after downsampling; plenty for a 1200px wide chart
+DEFAULT_MAX_POINTS = 1000
+
+
+def lttb(x, y, threshold):
+    """Largest-Triangle-Three-Buckets downsampling.
+
+    Returns the indices of `threshold` points of (x, y) that preserve the visual
+    shape of the series (peaks and troughs survive, unlike plain striding).
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+
+    a = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        # Average of the next bucket (or the last point for the final bucket)
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[end:next_end].mean()
+        avg_y = y[end:next_end].mean()
+        # Point in this bucket forming the largest triangle with a and the next average
+        areas = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(np.argmax(areas))
+        selected[i + 1] = a
+    return selected
+
+
+def downsample_series(series, max_points=DEFAULT_MAX_POINTS):
+    """Return (dates, values) of a pandas Series reduced with LTTB, dropping NaNs first"""
+    series = series.dropna()
+    x = series.index.values.astype('datetime64[ns]').astype(np.int64)
+    idx = lttb(x, series.values, max_points)
+    return series.index.values[idx], series.values[idx]
+
+
+def _render_chart(job):
+    """Draw one index's chart to PNG; runs in a worker process"""
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    name, score, panels, path = job
+    fig, axes = plt.subplots(len(panels), 1, figsize=(12, 4 * len(panels)), squeeze=False)
+    for ax, panel in zip(axes[:, 0], panels):
+        for label, (dates, values, style) in panel['series'].items():
+            ax.plot(dates, values, label=label, **style)
+        for level, style in panel.get('hlines', []):
+            ax.axhline(level, **style)
+        if panel.get('ylabel'):
+            ax.set_ylabel(panel['ylabel'])
+        ax.legend()
+    axes[0, 0].set_title(f"{name} (score {score:.4f})")
+    fig.tight_layout()
+    fig.savefig(path, dpi=100)
+    plt.close(fig)
+    return path
+
+
+def write_report(results, report_dir, panel_spec, title="Index Report",
+                 max_points=DEFAULT_MAX_POINTS, workers=None):
+    """Render a PNG chart per (name, score, data) result and an index.html into report_dir.
+
+    `panel_spec` is a list of panels, each a dict with 'series' (list of
+    (column, style) pairs), and optional 'ylabel' and 'hlines' ((level, style)
+    pairs). Series are LTTB-downsampled here, so only small arrays are sent to
+    the rendering processes.
+    """
+    os.makedirs(report_dir, exist_ok=True)
+    jobs = []
+    for rank, (name, score, data) in enumerate(results, 1):
+        panels = []
+        for spec in panel_spec:
+            series = {}
+            for column, style in spec['series']:
+                if column in data:
+                    dates, values = downsample_series(data[column], max_points)
+                    series[column] = (dates, values, style)
+            panels.append({'series': series, 'ylabel': spec.get('ylabel'), 'hlines': spec.get('hlines', [])})
+        filename = f"{rank:02d}_{''.join(c if c.isalnum() else '_' for c in name)}.png"
+        jobs.append((name, score, panels, os.path.join(report_dir, filename)))
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        paths = list(pool.map(_render_chart, jobs))
+
+    rows = "\n".join(
+        f"<h2>{rank}. {html.escape(name)} &mdash; score {score:.4f}</h2>\n"
+        f'<img src="{html.escape(os.path.basename(path))}" alt="{html.escape(name)}">'
+        for rank, ((name, score, _), path) in enumerate(zip(results, paths), 1)
+    )
+    index_path = os.path.join(report_dir, 'index.html')
+    with open(index_path, 'w') as f:
+        f.write(f"<!DOCTYPE html>\n<html><head><meta charset=\"utf-8\"><title>{html.escape(title)}</title></head>\n"
+                f"<body>\n<h1>{html.escape(title)}</h1>\n{rows}\n</body></html>\n")
+    print(f"Report written to {index_path}")
+    return index_path
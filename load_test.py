@@ -0,0 +1,139 @@
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+import urllib.request
+from urllib.error import URLError
+from urllib.parse import urlsplit
+
+from fake_upstreams import FakeUpstreams
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(pct / 100 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+async def _virtual_user(host, port, request, remaining, latencies, errors):
+    """Send requests over one keep-alive connection until `remaining` is exhausted"""
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for _ in remaining:
+            start = time.perf_counter()
+            writer.write(request)
+            status_line = await reader.readline()
+            length = 0
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b""):
+                    break
+                if line.lower().startswith(b"content-length:"):
+                    length = int(line.split(b":", 1)[1])
+            await reader.readexactly(length)
+            latencies.append(time.perf_counter() - start)
+            if status_line.split(b" ", 2)[1:2] != [b"200"]:
+                errors.append(status_line)
+    finally:
+        writer.close()
+
+
+async def run_load(url, total, concurrency, payload):
+    """POST payload to url `total` times with `concurrency` keep-alive connections.
+
+    Uses raw asyncio streams rather than an HTTP client library so the generator
+    itself is not the bottleneck. Returns (latencies in seconds, error count,
+    elapsed seconds).
+    """
+    target = urlsplit(url)
+    body = json.dumps(payload).encode()
+    request = (
+        f"POST {target.path or '/'} HTTP/1.1\r\nHost: {target.netloc}\r\n"
+        f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n"
+    ).encode() + body
+    latencies = []
+    errors = []
+    remaining = iter(range(total))
+
+    start = time.perf_counter()
+    results = await asyncio.gather(
+        *(_virtual_user(target.hostname, target.port or 80, request, remaining, latencies, errors)
+          for _ in range(concurrency)),
+        return_exceptions=True,
+    )
+    elapsed = time.perf_counter() - start
+    connection_errors = sum(isinstance(result, Exception) for result in results)
+
+    return latencies, len(errors) + connection_errors, elapsed
+
+
+def print_summary(latencies, errors, elapsed):
+    latencies = sorted(latencies)
+    print(f"Requests:   {len(latencies)} ({errors} errors)")
+    print(f"Duration:   {elapsed:.2f}s")
+    print(f"Throughput: {len(latencies) / elapsed:.0f} req/s")
+    for pct in (50, 90, 99):
+        print(f"p{pct}:        {percentile(latencies, pct) * 1000:.1f} ms")
+    print(f"max:        {latencies[-1] * 1000:.1f} ms" if latencies else "max:        n/a")
+
+
+def start_service(port, workers, upstream_url):
+    """Launch asgi_service.py against the fake upstreams and wait until it is healthy"""
+    env = dict(os.environ,
+               TWILIO_API_URL=upstream_url, DEEPSEEK_API_URL=upstream_url,
+               ACCOUNT_SID='ACloadtest', AUTH_TOKEN='token', TWILIO_PHONE_NUMBER='+15005550006')
+    service = subprocess.Popen(
+        [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'asgi_service.py'),
+         '--host', '127.0.0.1', '--port', str(port), '--workers', str(workers)],
+        env=env,
+    )
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            with urllib.request.urlopen(f'http://127.0.0.1:{port}/healthz') as response:
+                if response.status == 200:
+                    return service
+        except (URLError, ConnectionError):
+            time.sleep(0.2)
+    service.terminate()
+    raise RuntimeError("Service did not become healthy within 30 seconds")
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Load generator for the /send_love service")
+    parser.add_argument("--url", help="Target URL; if omitted, asgi_service.py is started against fake upstreams")
+    parser.add_argument("-n", "--requests", type=int, default=10000)
+    parser.add_argument("-c", "--concurrency", type=int, default=1000)
+    parser.add_argument("-w", "--workers", type=int, default=os.cpu_count() or 1,
+                        help="Service worker processes when starting the service locally")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--upstream-delay", type=float, default=0.05,
+                        help="Simulated latency of each fake upstream call in seconds")
+    parser.add_argument("--message", default="",
+                        help="Include this message in each request to exercise the AI path")
+    args = parser.parse_args()
+
+    service = None
+    url = args.url
+    if url is None:
+        fake = FakeUpstreams(delay=args.upstream_delay).start()
+        service = start_service(args.port, args.workers, fake.url)
+        url = f'http://127.0.0.1:{args.port}/send_love'
+
+    payload = {"user_number": "+15005550006"}
+    if args.message:
+        payload["message"] = args.message
+
+    try:
+        print(f"Sending {args.requests} requests to {url} with concurrency {args.concurrency}...")
+        print_summary(*asyncio.run(run_load(url, args.requests, args.concurrency, payload)))
+    finally:
+        if service is not None:
+            service.terminate()
+            service.wait()
@@ -0,0 +1,94 @@
+import numpy as np
+import pandas as pd
+
+
+class MarketPanel:
+    """Indices on different trading calendars aligned once into dates x symbols arrays.
+
+    The calendar is the sorted union of every symbol's dates. Each symbol's rows
+    are placed with a single searchsorted into one contiguous float array per
+    field, and `valid` marks which (date, symbol) cells were real sessions. With
+    that, returns, latest values and cross-market comparisons are plain
+    vectorized numpy operations with no per-symbol reindexing.
+    """
+
+    def __init__(self, dates, symbols, values, valid, rows=None):
+        self.dates = dates  # datetime64[ns], sorted and unique
+        self.symbols = list(symbols)
+        self.values = values  # field -> (dates, symbols) float64 array, NaN outside sessions
+        self.valid = valid  # (dates, symbols) bool, True where the symbol traded that day
+        self.rows = rows  # (date position, symbol position) of each source row, for gather()
+        # Position of the most recent session at or before each date, -1 before the first
+        last = np.where(valid, np.arange(len(dates))[:, None], -1)
+        self.last_session = np.maximum.accumulate(last, axis=0)
+
+    @classmethod
+    def from_frames(cls, frames, fields=('Adj Close',)):
+        """Build from {symbol: DataFrame indexed by date}"""
+        symbols = list(frames)
+        stamps = [frames[s].index.values.astype('datetime64[ns]') for s in symbols]
+        dates = np.unique(np.concatenate(stamps)) if stamps else np.array([], dtype='datetime64[ns]')
+        values = {field: np.full((len(dates), len(symbols)), np.nan) for field in fields}
+        valid = np.zeros((len(dates), len(symbols)), dtype=bool)
+        keys = dates.view(np.int64)
+        for j, symbol in enumerate(symbols):
+            pos = np.searchsorted(keys, stamps[j].view(np.int64))
+            valid[pos, j] = True
+            for field in fields:
+                values[field][pos, j] = frames[symbol][field].to_numpy(dtype=float)
+        return cls(dates, symbols, values, valid)
+
+    @classmethod
+    def from_stacked(cls, df, key='Index', fields=('Adj Close',)):
+        """Build from stacked per-symbol rows (track_indices output), remembering each row's cell"""
+        stamps = df.index.values.astype('datetime64[ns]')
+        codes, symbols = pd.factorize(df[key])
+        dates, date_pos = np.unique(stamps, return_inverse=True)
+        values = {}
+        for field in fields:
+            grid = np.full((len(dates), len(symbols)), np.nan)
+            grid[date_pos, codes] = df[field].to_numpy(dtype=float)
+            values[field] = grid
+        valid = np.zeros((len(dates), len(symbols)), dtype=bool)
+        valid[date_pos, codes] = True
+        return cls(dates, symbols, values, valid, rows=(date_pos, codes))
+
+    def aligned(self, field, max_fill=5):
+        """Field forward-filled from each symbol's last session, for at most max_fill calendar rows"""
+        rows = np.arange(len(self.dates))[:, None]
+        source = np.maximum(self.last_session, 0)
+        filled = np.take_along_axis(self.values[field], source, axis=0)
+        stale = (self.last_session < 0) | (rows - self.last_session > max_fill)
+        filled[stale] = np.nan
+        return filled
+
+    def returns(self, field='Adj Close'):
+        """Session-to-session returns per symbol, NaN on dates the symbol didn't trade.
+
+        Each return is taken against the symbol's own previous session, so
+        holidays on other calendars never produce fake zero returns and
+        returns never cross from one symbol into another.
+        """
+        previous = np.vstack([np.full((1, len(self.symbols)), -1), self.last_session[:-1]])
+        base = np.take_along_axis(self.values[field], np.maximum(previous, 0), axis=0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            result = self.values[field] / base - 1
+        result[~self.valid | (previous < 0)] = np.nan
+        return result
+
+    def latest(self, field='Adj Close'):
+        """Last non-missing value of field per symbol"""
+        values = self.values[field]
+        present = ~np.isnan(values)
+        last = np.maximum.accumulate(np.where(present, np.arange(len(self.dates))[:, None], -1), axis=0)[-1]
+        result = values[np.maximum(last, 0), np.arange(len(self.symbols))]
+        result[last < 0] = np.nan
+        return result
+
+    def gather(self, matrix):
+        """Values of a (dates, symbols) array at each source row given to from_stacked"""
+        date_pos, codes = self.rows
+        return matrix[date_pos, codes]
+
+    def to_frame(self, matrix):
+        return pd.DataFrame(matrix, index=pd.DatetimeIndex(self.dates, name='Date'), columns=self.symbols)
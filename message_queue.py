@@ -0,0 +1,204 @@
+import json
+import sqlite3
+import threading
+import time
+import uuid
+
+
+class MessageQueue:
+    """Persistent SQLite-backed job queue drained by a pool of worker threads.
+
+    `handler(payload)` is called for every job; whatever it returns (e.g. the Twilio
+    message SID) is stored as the job result. Failed jobs are retried with
+    exponential backoff up to `max_attempts`. Jobs left in "processing" by a crashed
+    process are picked up again once their lease expires.
+    """
+
+    def __init__(self, path, handler, workers=4, batch_size=20, max_attempts=5,
+                 retry_delay=2.0, lease=300.0, poll_interval=1.0):
+        self.path = path
+        self.handler = handler
+        self.workers = workers
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.lease = lease
+        self.poll_interval = poll_interval
+        self.local = threading.local()
+        self.wake = threading.Event()
+        self.stopping = threading.Event()
+        self.threads = []
+        self.start_lock = threading.Lock()
+        self._create_schema()
+
+    def _connection(self):
+        """Return this thread's SQLite connection (connections can't be shared across threads)"""
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self.local.conn = conn
+        return conn
+
+    def _create_schema(self):
+        self._connection().executescript("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                payload TEXT NOT NULL,
+                status TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                result TEXT,
+                error TEXT,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL,
+                next_attempt_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS jobs_ready ON jobs (status, next_attempt_at);
+        """)
+
+    def enqueue(self, payload, job_id=None):
+        """Persist a job and return its id; workers are started on first use"""
+        return self.enqueue_many([payload], None if job_id is None else [job_id])[0]
+
+    def enqueue_many(self, payloads, job_ids=None):
+        """Persist several jobs in one transaction and return their ids"""
+        now = time.time()
+        if job_ids is None:
+            job_ids = [uuid.uuid4().hex for _ in payloads]
+        rows = [(job_id, json.dumps(payload), now, now, now) for job_id, payload in zip(job_ids, payloads)]
+        conn = self._connection()
+        conn.execute("BEGIN")
+        try:
+            conn.executemany(
+                "INSERT INTO jobs (id, payload, status, created_at, updated_at, next_attempt_at) "
+                "VALUES (?, ?, 'queued', ?, ?, ?)", rows
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            _rollback(conn)
+            raise
+        self.start()
+        self.wake.set()
+        return [row[0] for row in rows]
+
+    def status(self, job_id):
+        """Return the job's state as a dict, or None for an unknown id"""
+        row = self._connection().execute(
+            "SELECT id, status, attempts, result, error, created_at, updated_at FROM jobs WHERE id = ?",
+            (job_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        keys = ("job_id", "status", "attempts", "result", "error", "created_at", "updated_at")
+        return dict(zip(keys, row))
+
+    def start(self):
+        """Start the worker threads if they are not running yet"""
+        with self.start_lock:
+            if self.threads:
+                return
+            self.stopping.clear()
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._work, name=f"outbox-{i}", daemon=True)
+                thread.start()
+                self.threads.append(thread)
+
+    def stop(self, timeout=None):
+        """Ask the workers to finish their current batch and exit"""
+        self.stopping.set()
+        self.wake.set()
+        for thread in self.threads:
+            thread.join(timeout)
+        self.threads = []
+
+    def _claim_batch(self):
+        """Atomically mark up to batch_size ready jobs as processing and return them"""
+        now = time.time()
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            rows = conn.execute(
+                "SELECT id, payload, attempts FROM jobs "
+                "WHERE (status = 'queued' AND next_attempt_at <= ?) "
+                "   OR (status = 'processing' AND updated_at <= ?) "
+                "ORDER BY next_attempt_at LIMIT ?",
+                (now, now - self.lease, self.batch_size)
+            ).fetchall()
+            conn.executemany(
+                "UPDATE jobs SET status = 'processing', updated_at = ? WHERE id = ?",
+                [(now, row[0]) for row in rows]
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            _rollback(conn)
+            raise
+        return rows
+
+    def _work(self):
+        updates = []  # Results not written yet because the last write failed
+        errors = 0
+        while not self.stopping.is_set():
+            try:
+                if updates:
+                    self._record(updates)
+                    updates = []
+                batch = self._claim_batch()
+                if not batch:
+                    errors = 0
+                    self.wake.wait(self.poll_interval)
+                    self.wake.clear()
+                    continue
+                updates = self._process(batch)
+                self._record(updates)
+                updates = []
+                errors = 0
+            except Exception as e:
+                # e.g. "database is locked"; a dead worker would leave every job queued
+                _rollback(self._connection())
+                delay = min(self.poll_interval * 2 ** errors, 60.0)
+                errors += 1
+                print(f"Outbox worker error, retrying in {delay:.1f}s: {e}")
+                self.stopping.wait(delay)
+
+    def _process(self, batch):
+        """Run the handler on each claimed job and return the rows for _record"""
+        updates = []
+        for job_id, payload, attempts in batch:
+            attempts += 1
+            now = time.time()
+            try:
+                result = self.handler(json.loads(payload))
+                updates.append(("sent", attempts, _as_text(result), None, now, now, job_id))
+            except Exception as e:
+                if attempts >= self.max_attempts:
+                    updates.append(("failed", attempts, None, str(e), now, now, job_id))
+                else:
+                    retry_at = now + self.retry_delay * 2 ** (attempts - 1)
+                    updates.append(("queued", attempts, None, str(e), now, retry_at, job_id))
+        return updates
+
+    def _record(self, updates):
+        conn = self._connection()
+        conn.execute("BEGIN")
+        try:
+            conn.executemany(
+                "UPDATE jobs SET status = ?, attempts = ?, result = ?, error = ?, "
+                "updated_at = ?, next_attempt_at = ? WHERE id = ?", updates
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            _rollback(conn)
+            raise
+
+
+def _rollback(conn):
+    # A failed COMMIT can leave the transaction open, and the next BEGIN on this connection would fail
+    if conn.in_transaction:
+        conn.execute("ROLLBACK")
+
+
+def _as_text(result):
+    if result is None or isinstance(result, str):
+        return result
+    return json.dumps(result)
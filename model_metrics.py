@@ -0,0 +1,149 @@
+import json
+import threading
+import time
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict
+
+# Latency histogram bucket upper bounds in seconds
+LATENCY_BUCKETS = (0.25, 0.5, 1, 2, 5, 10, 20, 30, 60, 120)
+
+# Estimated USD per 1K (prompt, completion) tokens, matched by model prefix
+MODEL_PRICES = {
+    "gpt-4o": (0.0025, 0.01),
+    "gpt-4": (0.03, 0.06),
+    "gpt-3.5": (0.0005, 0.0015),
+    "claude-3-opus": (0.015, 0.075),
+    "claude-3-sonnet": (0.003, 0.015),
+    "claude-3-haiku": (0.00025, 0.00125),
+    "gemini-pro": (0.0005, 0.0015),
+}
+
+
+def estimate_cost(model: str, prompt_tokens: int, completion_tokens: int) -> float:
+    """Estimate the USD cost of a call from the longest matching price prefix"""
+    matches = [prefix for prefix in MODEL_PRICES if model.startswith(prefix)]
+    if not matches:
+        return 0.0
+    prompt_price, completion_price = MODEL_PRICES[max(matches, key=len)]
+    return (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1000
+
+
+class _ModelStats:
+    __slots__ = ("calls", "errors", "latency_sum", "buckets",
+                 "prompt_tokens", "completion_tokens", "cost")
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.latency_sum = 0.0
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)  # Last bucket is +Inf
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.cost = 0.0
+
+
+class ModelMetrics:
+    """Per-model latency, token, cost and error counters for ModelClient calls"""
+
+    def __init__(self):
+        self.stats: Dict[str, _ModelStats] = {}
+        self.lock = threading.Lock()
+
+    def record(self, model: str, latency: float, prompt_tokens: int = 0,
+               completion_tokens: int = 0, error: bool = False):
+        """Record one generate_response call"""
+        with self.lock:
+            stats = self.stats.get(model)
+            if stats is None:
+                stats = self.stats[model] = _ModelStats()
+            stats.calls += 1
+            stats.errors += error
+            stats.latency_sum += latency
+            stats.buckets[bisect_left(LATENCY_BUCKETS, latency)] += 1
+            stats.prompt_tokens += prompt_tokens
+            stats.completion_tokens += completion_tokens
+            stats.cost += estimate_cost(model, prompt_tokens, completion_tokens)
+
+    def snapshot(self) -> Dict[str, Dict]:
+        """Return a JSON-serialisable copy of the current counters"""
+        with self.lock:
+            return {
+                model: {
+                    "calls": s.calls,
+                    "errors": s.errors,
+                    "latency_sum": s.latency_sum,
+                    "latency_avg": s.latency_sum / s.calls if s.calls else 0.0,
+                    "latency_buckets": dict(zip([str(b) for b in LATENCY_BUCKETS] + ["+Inf"],
+                                                s.buckets)),
+                    "prompt_tokens": s.prompt_tokens,
+                    "completion_tokens": s.completion_tokens,
+                    "estimated_cost_usd": s.cost,
+                }
+                for model, s in self.stats.items()
+            }
+
+    def to_prometheus(self) -> str:
+        """Render the counters in the Prometheus text exposition format"""
+        snapshot = self.snapshot()
+        lines = ["# TYPE model_request_duration_seconds histogram"]
+        for model, s in snapshot.items():
+            cumulative = 0
+            for bound, count in s["latency_buckets"].items():
+                cumulative += count
+                lines.append(f'model_request_duration_seconds_bucket{{model="{model}",le="{bound}"}} {cumulative}')
+            lines.append(f'model_request_duration_seconds_sum{{model="{model}"}} {s["latency_sum"]}')
+            lines.append(f'model_request_duration_seconds_count{{model="{model}"}} {s["calls"]}')
+
+        counters = (
+            ("model_requests_total", "calls"),
+            ("model_errors_total", "errors"),
+            ("model_prompt_tokens_total", "prompt_tokens"),
+            ("model_completion_tokens_total", "completion_tokens"),
+            ("model_estimated_cost_usd_total", "estimated_cost_usd"),
+        )
+        for name, key in counters:
+            lines.append(f"# TYPE {name} counter")
+            for model, s in snapshot.items():
+                lines.append(f'{name}{{model="{model}"}} {s[key]}')
+        return "\n".join(lines) + "\n"
+
+    def serve(self, port: int, host: str = "0.0.0.0") -> ThreadingHTTPServer:
+        """Expose /metrics in Prometheus text format from a daemon thread"""
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path != "/metrics":
+                    self.send_error(404)
+                    return
+                body = metrics.to_prometheus().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+    def dump_periodically(self, path: str, interval: float = 60.0) -> threading.Event:
+        """Write a JSON snapshot to path every interval seconds until the returned event is set"""
+        stop = threading.Event()
+
+        def loop():
+            while not stop.wait(interval):
+                self.dump(path)
+            self.dump(path)
+
+        threading.Thread(target=loop, daemon=True).start()
+        return stop
+
+    def dump(self, path: str):
+        """Write a JSON snapshot to path"""
+        with open(path, "w") as f:
+            json.dump({"timestamp": time.time(), "models": self.snapshot()}, f, indent=2)
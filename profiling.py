@@ -0,0 +1,144 @@
+"""Opt-in stage timers and per-ticker spans for the analysis scripts.
+
+Code takes a `tracer=NULL_TRACER` argument and wraps its work in
+`tracer.stage('fetch')` / `tracer.span(ticker)`; pass a Tracer to enable it
+(None is not accepted). The shared NULL_TRACER hands back one reusable
+nullcontext, so the disabled cost is a method call. A real Tracer records
+every stage and span with wall-clock start and duration, can capture cProfile
+stats and tracemalloc peaks per stage, and exports a Chrome trace
+(chrome://tracing or https://ui.perfetto.dev).
+"""
+import contextlib
+import cProfile
+import io
+import json
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+
+_NULL_CONTEXT = contextlib.nullcontext()
+
+
+class NullTracer:
+    """Tracer stand-in that records nothing"""
+
+    enabled = False
+
+    def stage(self, name):
+        return _NULL_CONTEXT
+
+    def span(self, name, **args):
+        return _NULL_CONTEXT
+
+
+NULL_TRACER = NullTracer()
+
+
+class Tracer:
+    """Record stages and spans; optionally cProfile and tracemalloc each stage.
+
+    A stage may be entered many times (e.g. 'download' once per ticker); its
+    profile is accumulated and its memory peak is the largest seen. Stages
+    should not be nested inside each other when memory capture is on, since
+    each entry resets the tracemalloc peak.
+    """
+
+    enabled = True
+
+    def __init__(self, profile=False, memory=False):
+        self.profile = profile
+        self.memory = memory
+        self.origin = time.perf_counter()
+        self.events = []  # (category, name, start seconds, duration seconds, thread id, args)
+        self.profiles = {}  # stage -> cProfile.Profile
+        self.memory_peaks = {}  # stage -> peak bytes
+        self.lock = threading.Lock()
+        self._profiling = False
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        profiler = None
+        if self.profile and not self._profiling:
+            profiler = self.profiles.setdefault(name, cProfile.Profile())
+            self._profiling = True
+            profiler.enable()
+        owns_tracemalloc = False
+        if self.memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                owns_tracemalloc = True
+            tracemalloc.reset_peak()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            duration = time.perf_counter() - start
+            args = {}
+            if self.memory:
+                peak = tracemalloc.get_traced_memory()[1]
+                if owns_tracemalloc:
+                    tracemalloc.stop()
+                self.memory_peaks[name] = max(peak, self.memory_peaks.get(name, 0))
+                args['peak_mb'] = round(peak / 1e6, 3)
+            if profiler is not None:
+                profiler.disable()
+                self._profiling = False
+            self._record('stage', name, start, duration, args)
+
+    @contextlib.contextmanager
+    def span(self, name, **args):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._record('ticker', name, start, time.perf_counter() - start, args)
+
+    def _record(self, category, name, start, duration, args):
+        with self.lock:
+            self.events.append((category, name, start - self.origin, duration, threading.get_ident(), args))
+
+    def write_chrome_trace(self, path):
+        """Write events in Chrome trace-event JSON ("X" complete events, microseconds)"""
+        pid = os.getpid()
+        trace = [
+            {'name': name, 'cat': category, 'ph': 'X', 'ts': round(start * 1e6), 'dur': round(duration * 1e6),
+             'pid': pid, 'tid': tid, 'args': args}
+            for category, name, start, duration, tid, args in self.events
+        ]
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': trace, 'displayTimeUnit': 'ms'}, f)
+        print(f"Trace written to {path}")
+
+    def stage_totals(self):
+        """{stage: (calls, total seconds)}, slowest first"""
+        totals = {}
+        for category, name, _, duration, _, _ in self.events:
+            if category == 'stage':
+                calls, total = totals.get(name, (0, 0.0))
+                totals[name] = (calls + 1, total + duration)
+        return dict(sorted(totals.items(), key=lambda item: item[1][1], reverse=True))
+
+    def slowest_spans(self, top=10):
+        spans = [(name, duration) for category, name, _, duration, _, _ in self.events if category == 'ticker']
+        return sorted(spans, key=lambda span: span[1], reverse=True)[:top]
+
+    def summary(self, top=10, profile_lines=10):
+        """Text table of stages and the slowest tickers, plus top functions of profiled stages"""
+        lines = ["", f"{'Stage':<24}{'Calls':>8}{'Total s':>12}{'Peak MB':>12}"]
+        for name, (calls, total) in self.stage_totals().items():
+            peak = self.memory_peaks.get(name)
+            peak = f"{peak / 1e6:12.1f}" if peak is not None else f"{'-':>12}"
+            lines.append(f"{name:<24}{calls:>8}{total:>12.3f}{peak}")
+
+        spans = self.slowest_spans(top)
+        if spans:
+            lines += ["", f"{'Slowest tickers':<36}{'Seconds':>12}"]
+            lines += [f"{name:<36}{duration:>12.3f}" for name, duration in spans]
+
+        for name, profiler in self.profiles.items():
+            out = io.StringIO()
+            pstats.Stats(profiler, stream=out).sort_stats('cumulative').print_stats(profile_lines)
+            lines += ["", f"--- cProfile: {name} ---", out.getvalue().strip()]
+        return "\n".join(lines)
@@ -0,0 +1,32 @@
+import threading
+import time
+
+
+class RateLimiter:
+    """Thread-safe token bucket limiting calls to `rate` per second.
+
+    A rate of 0 or None disables limiting. `burst` is the number of calls
+    that may go through back to back before the limit kicks in.
+    """
+
+    def __init__(self, rate=None, burst=1):
+        self.rate = rate or 0
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a token is available."""
+        if not self.rate:
+            return
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
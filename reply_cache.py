@@ -0,0 +1,98 @@
+import random
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+_PUNCTUATION_RE = re.compile(r'[^\w\s]')
+_WHITESPACE_RE = re.compile(r'\s+')
+
+
+def normalize_message(text):
+    """Cache key for a message: lowercase, no punctuation, single spaces.
+
+    Messages with nothing but emoji or punctuation keep them, so that "🎉" and
+    "😢" don't share a key.
+    """
+    text = text.lower()
+    key = _WHITESPACE_RE.sub(' ', _PUNCTUATION_RE.sub('', text)).strip()
+    return key or _WHITESPACE_RE.sub(' ', text).strip()
+
+
+class ReplyCache:
+    """AI replies with an LRU/TTL cache, a hard latency budget and refresh-ahead.
+
+    `reply(text)` returns a cached AI reply for the normalized text when there is
+    one. Otherwise it asks `ai_client.get_response` and waits at most `budget`
+    seconds, returning a random fallback reply if the AI is slower; the AI call
+    keeps running and its answer is cached for the next request. Inputs seen at
+    least `prefetch_after` times are regenerated in the background before their
+    cache entry expires. At most `max_pending` AI calls are queued or running;
+    beyond that, uncached messages get a fallback straight away.
+    """
+
+    def __init__(self, ai_client, fallback_replies, maxsize=1024, ttl=3600.0,
+                 budget=2.0, workers=4, prefetch_after=3, max_pending=None):
+        self.ai_client = ai_client
+        self.fallback_replies = fallback_replies
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.budget = budget
+        self.prefetch_after = prefetch_after
+        self.max_pending = workers * 4 if max_pending is None else max_pending
+        self.entries = OrderedDict()  # key -> (reply, expires_at)
+        self.hits = OrderedDict()  # key -> request count, bounded like entries
+        self.inflight = {}  # key -> Future, so identical requests share one AI call
+        self.lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='ai-reply')
+
+    def reply(self, text):
+        key = normalize_message(text)
+        now = time.monotonic()
+        with self.lock:
+            count = self.hits.pop(key, 0) + 1
+            self.hits[key] = count
+            if len(self.hits) > self.maxsize * 4:
+                self.hits.popitem(last=False)
+
+            entry = self.entries.get(key)
+            if entry is not None and entry[1] > now:
+                self.entries.move_to_end(key)
+                # Refresh frequent inputs once they are 80% of the way to expiry
+                if count >= self.prefetch_after and entry[1] - now < self.ttl * 0.2:
+                    self._fetch_locked(key, text)
+                return entry[0]
+
+            future = self._fetch_locked(key, text)
+
+        if future is None:
+            return random.choice(self.fallback_replies)
+        try:
+            return future.result(timeout=self.budget)
+        except Exception:
+            # Over budget (TimeoutError) or the AI call failed
+            return random.choice(self.fallback_replies)
+
+    def _fetch_locked(self, key, text):
+        """Start (or join) the AI call for key, None when at max_pending; caller must hold self.lock"""
+        future = self.inflight.get(key)
+        if future is None:
+            if len(self.inflight) >= self.max_pending:
+                return None  # The AI is falling behind; don't queue answers nobody will wait for
+            future = self.executor.submit(self._generate, key, text)
+            self.inflight[key] = future
+        return future
+
+    def _generate(self, key, text):
+        try:
+            reply = self.ai_client.get_response(text)
+            with self.lock:
+                self.entries[key] = (reply, time.monotonic() + self.ttl)
+                self.entries.move_to_end(key)
+                while len(self.entries) > self.maxsize:
+                    self.entries.popitem(last=False)
+            return reply
+        finally:
+            with self.lock:
+                self.inflight.pop(key, None)
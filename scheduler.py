@@ -0,0 +1,354 @@
+import contextlib
+import heapq
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+# SQLite's default limit on bound parameters per statement is 999
+_SQL_CHUNK = 900
+
+
+def next_daily_occurrence(local_time, tz, after=None):
+    """UTC timestamp of the next `local_time` ("HH:MM") in time zone `tz` after `after`"""
+    after = time.time() if after is None else after
+    zone = ZoneInfo(tz)
+    hour, minute = (int(part) for part in local_time.split(':'))
+    day = datetime.fromtimestamp(after, zone).date()
+    while True:
+        candidate = datetime(day.year, day.month, day.day, hour, minute, tzinfo=zone).timestamp()
+        if candidate > after:
+            return candidate
+        day += timedelta(days=1)
+
+
+@contextlib.contextmanager
+def _transaction(conn, mode=''):
+    """BEGIN ... COMMIT, rolling back on failure so the connection isn't left inside a transaction"""
+    conn.execute(f"BEGIN {mode}")
+    try:
+        yield
+        conn.execute("COMMIT")
+    except Exception:
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+        raise
+
+
+class Scheduler:
+    """Persistent scheduler for timed message delivery.
+
+    Every pending entry lives in SQLite, indexed by due time, so jobs survive
+    restarts and millions of them cost only disk. Entries due within the next
+    `horizon` seconds are loaded into an in-memory heap of (due_at, id) pairs,
+    which gives O(log n) insert and pop for the hot window. Due entries are
+    handed to `dispatch(jobs)` in batches of up to `batch_size`, where each job
+    is a dict with id, to, body, use_whatsapp and due_at. dispatch may return
+    the ids of jobs that failed; those (or the whole batch, if it raises) are
+    retried after `retry_delay` seconds.
+
+    Entries added through this object go straight into the heap when they fall
+    inside the loaded window. When another process writes to the database
+    (e.g. the `add` subcommand), the loaded window is rescanned so entries it
+    added below the window's end are picked up too.
+    """
+
+    def __init__(self, path, dispatch, horizon=60.0, batch_size=500, max_loaded=200000,
+                 retry_delay=30.0):
+        self.path = path
+        self.dispatch = dispatch
+        self.horizon = horizon
+        self.batch_size = batch_size
+        self.max_loaded = max_loaded
+        self.retry_delay = retry_delay
+        self.heap = []
+        self.loaded = set()  # Ids in the heap or being dispatched
+        self.loaded_until = (float('-inf'), 0)  # (due_at, id) of the last entry loaded
+        self.data_version = None  # PRAGMA data_version at the last refill
+        self.undeleted = []  # Delivered one-off ids whose DELETE has not succeeded yet
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.stopping = threading.Event()
+        self._create_schema()
+
+    def _connection(self):
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self.local.conn = conn
+        return conn
+
+    def _create_schema(self):
+        self._connection().executescript("""
+            CREATE TABLE IF NOT EXISTS schedule (
+                id INTEGER PRIMARY KEY,
+                due_at REAL NOT NULL,
+                recipient TEXT NOT NULL,
+                body TEXT NOT NULL,
+                use_whatsapp INTEGER NOT NULL DEFAULT 0,
+                local_time TEXT,
+                tz TEXT
+            );
+            CREATE INDEX IF NOT EXISTS schedule_due ON schedule (due_at, id);
+        """)
+
+    def schedule(self, due_at, to, body, use_whatsapp=False):
+        """Schedule a one-off message at UTC timestamp `due_at` and return its id"""
+        return self.schedule_many([(due_at, to, body, use_whatsapp)])[0]
+
+    def schedule_daily(self, to, body, local_time, tz='UTC', use_whatsapp=False):
+        """Schedule a message every day at `local_time` ("HH:MM") in the recipient's time zone"""
+        return self.schedule_many(
+            [(next_daily_occurrence(local_time, tz), to, body, use_whatsapp, local_time, tz)]
+        )[0]
+
+    def schedule_many(self, entries):
+        """Insert (due_at, to, body[, use_whatsapp[, local_time, tz]]) tuples in one transaction"""
+        rows = [tuple(entry) + (False, None, None)[len(entry) - 3:] for entry in entries]
+        if not rows:
+            return []
+        conn = self._connection()
+        # The write lock makes the new rowids one contiguous run ending at last_insert_rowid()
+        with _transaction(conn, 'IMMEDIATE'):
+            conn.executemany(
+                "INSERT INTO schedule (due_at, recipient, body, use_whatsapp, local_time, tz) "
+                "VALUES (?, ?, ?, ?, ?, ?)", rows
+            )
+            last_id = conn.execute("SELECT last_insert_rowid()").fetchone()[0]
+        ids = range(last_id - len(rows) + 1, last_id + 1)
+
+        with self.lock:
+            for entry_id, row in zip(ids, rows):
+                if (row[0], entry_id) <= self.loaded_until:
+                    self._push((row[0], entry_id))
+        return list(ids)
+
+    def _push(self, entry):
+        if entry[1] not in self.loaded:
+            self.loaded.add(entry[1])
+            heapq.heappush(self.heap, entry)
+
+    def pending_count(self):
+        return self._connection().execute("SELECT COUNT(*) FROM schedule").fetchone()[0]
+
+    def _refill(self, now):
+        """Load entries due before now + horizon that are not in the heap yet"""
+        if len(self.heap) >= self.max_loaded:
+            return
+        conn = self._connection()
+        # data_version changes whenever another connection commits; rows it added
+        # below the watermark would otherwise never be loaded
+        version = conn.execute("PRAGMA data_version").fetchone()[0]
+        if version != self.data_version:
+            self.data_version = version
+            for row in conn.execute(
+                "SELECT due_at, id FROM schedule WHERE (due_at, id) <= (?, ?) ORDER BY due_at, id",
+                self.loaded_until
+            ):
+                self._push(row)
+        rows = conn.execute(
+            "SELECT due_at, id FROM schedule WHERE (due_at, id) > (?, ?) AND due_at <= ? "
+            "ORDER BY due_at, id LIMIT ?",
+            self.loaded_until + (now + self.horizon, self.max_loaded - len(self.heap))
+        ).fetchall()
+        for row in rows:
+            self._push(row)
+        if rows:
+            self.loaded_until = rows[-1]
+
+    def run_pending(self, now=None):
+        """Dispatch every entry that is due and return how many were dispatched"""
+        fired = 0
+        self._delete_done()
+        while True:
+            now = time.time() if now is None else now
+            with self.lock:
+                self._refill(now)
+                batch = []
+                while self.heap and self.heap[0][0] <= now and len(batch) < self.batch_size:
+                    batch.append(heapq.heappop(self.heap))
+            if not batch:
+                return fired
+            self._fire(batch, now)
+            fired += len(batch)
+
+    def _fire(self, entries, now):
+        conn = self._connection()
+        ids = [entry[1] for entry in entries]
+        jobs = []
+        try:
+            for i in range(0, len(ids), _SQL_CHUNK):
+                chunk = ids[i:i + _SQL_CHUNK]
+                jobs.extend(conn.execute(
+                    "SELECT id, recipient, body, use_whatsapp, local_time, tz, due_at FROM schedule "
+                    f"WHERE id IN ({','.join('?' * len(chunk))})", chunk
+                ).fetchall())
+        except Exception:
+            with self.lock:  # Put the batch back for the next attempt
+                for entry in entries:
+                    self.loaded.discard(entry[1])
+                    self._push(entry)
+            raise
+        with self.lock:
+            # Rows deleted by another process since they were loaded
+            self.loaded.difference_update(set(ids) - {job[0] for job in jobs})
+
+        try:
+            failed = set(self.dispatch([
+                {"id": job[0], "to": job[1], "body": job[2], "use_whatsapp": bool(job[3]), "due_at": job[6]}
+                for job in jobs
+            ]) or ())
+        except Exception as e:
+            print(f"Dispatch error, retrying {len(jobs)} messages in {self.retry_delay}s: {e}")
+            self._reschedule([(now + self.retry_delay, job[0]) for job in jobs])
+            return
+
+        if failed:
+            print(f"{len(failed)} messages failed, retrying in {self.retry_delay}s")
+            jobs = [job for job in jobs if job[0] not in failed]
+
+        updates = [(now + self.retry_delay, job_id) for job_id in failed]
+        updates += [(next_daily_occurrence(job[4], job[5], now), job[0]) for job in jobs if job[4]]
+        with self.lock:
+            self.undeleted.extend(job[0] for job in jobs if not job[4])
+        try:
+            self._reschedule(updates)
+        finally:
+            self._delete_done()
+
+    def _delete_done(self):
+        """Delete delivered one-off entries; until that succeeds they stay in `loaded` and never refire"""
+        with self.lock:
+            ids = list(self.undeleted)
+        if not ids:
+            return
+        conn = self._connection()
+        with _transaction(conn):
+            for i in range(0, len(ids), _SQL_CHUNK):
+                chunk = ids[i:i + _SQL_CHUNK]
+                conn.execute(f"DELETE FROM schedule WHERE id IN ({','.join('?' * len(chunk))})", chunk)
+        with self.lock:
+            del self.undeleted[:len(ids)]
+            self.loaded.difference_update(ids)
+
+    def _reschedule(self, updates):
+        """Move entries to new due times, keeping the heap in sync"""
+        if not updates:
+            return
+        conn = self._connection()
+        try:
+            with _transaction(conn):
+                conn.executemany("UPDATE schedule SET due_at = ? WHERE id = ?", updates)
+        finally:
+            # Even if the write failed, retry at the new time rather than strand the entries
+            with self.lock:
+                for entry in updates:
+                    self.loaded.discard(entry[1])
+                    if entry <= self.loaded_until:
+                        self._push(entry)
+
+    def run_forever(self, poll_interval=1.0):
+        """Dispatch due entries until stop() is called"""
+        errors = 0
+        while not self.stopping.is_set():
+            try:
+                self.run_pending()
+                errors = 0
+                delay = poll_interval
+            except Exception as e:
+                # e.g. "database is locked"; back off instead of letting the daemon die
+                delay = min(poll_interval * 2 ** errors, 60.0)
+                errors += 1
+                print(f"Scheduler error, retrying in {delay:.1f}s: {e}")
+            self.stopping.wait(delay)
+
+    def stop(self):
+        self.stopping.set()
+
+
+def send_with_twilio(jobs):
+    """Dispatcher delivering each job through send_loving.send_love_message; returns failed ids"""
+    from send_loving import send_love_message
+    failed = []
+    for job in jobs:
+        # Keyed per occurrence so a crash between send and delete can't send twice
+        try:
+            send_love_message(job["to"], job["body"], job["use_whatsapp"],
+                              idempotency_key=f"schedule-{job['id']}-{job['due_at']}", raise_errors=True)
+        except Exception:
+            failed.append(job["id"])
+    return failed
+
+
+def benchmark(count, path):
+    """Time bulk insert and fire throughput for `count` entries with a no-op dispatcher"""
+    import os
+    import random
+
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+    dispatched = []
+    scheduler = Scheduler(path, lambda jobs: dispatched.append(len(jobs)), batch_size=5000)
+    now = time.time()
+    entries = [(now + random.random() * 10, f"+1415555{i % 10000:04d}", "Scheduled love 💖")
+               for i in range(count)]
+
+    start = time.perf_counter()
+    for i in range(0, count, 50000):
+        scheduler.schedule_many(entries[i:i + 50000])
+    insert_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    fired = scheduler.run_pending(now + 60)
+    fire_time = time.perf_counter() - start
+
+    print(f"Inserted {count} entries in {insert_time:.2f}s ({count / insert_time:,.0f}/s)")
+    print(f"Fired {fired} entries in {fire_time:.2f}s ({fired / fire_time:,.0f}/s, "
+          f"{len(dispatched)} dispatch batches)")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Scheduled love message delivery")
+    parser.add_argument("--db", default="love_schedule.db", help="SQLite file holding the schedule")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    add = sub.add_parser("add", help="Schedule a one-off message")
+    add.add_argument("to")
+    add.add_argument("message")
+    add.add_argument("--at", required=True, help="ISO time, e.g. 2026-02-14T09:00:00+05:30")
+    add.add_argument("--whatsapp", action="store_true")
+
+    daily = sub.add_parser("daily", help="Schedule a message every day in the recipient's time zone")
+    daily.add_argument("to")
+    daily.add_argument("message")
+    daily.add_argument("--time", default="09:00", help="Local time, HH:MM")
+    daily.add_argument("--tz", default="UTC", help="IANA time zone, e.g. Asia/Kolkata")
+    daily.add_argument("--whatsapp", action="store_true")
+
+    sub.add_parser("run", help="Deliver messages as they come due")
+
+    bench = sub.add_parser("bench", help="Measure insert and fire throughput")
+    bench.add_argument("-n", "--count", type=int, default=1000000)
+
+    args = parser.parse_args()
+
+    if args.command == "bench":
+        benchmark(args.count, args.db if args.db != "love_schedule.db" else "schedule_bench.db")
+    else:
+        scheduler = Scheduler(args.db, send_with_twilio)
+        if args.command == "add":
+            due_at = datetime.fromisoformat(args.at).timestamp()
+            print(f"Scheduled message {scheduler.schedule(due_at, args.to, args.message, args.whatsapp)}")
+        elif args.command == "daily":
+            entry_id = scheduler.schedule_daily(args.to, args.message, args.time, args.tz, args.whatsapp)
+            print(f"Scheduled daily message {entry_id}")
+        elif args.command == "run":
+            print(f"Delivering scheduled messages ({scheduler.pending_count()} pending)...")
+            scheduler.run_forever()
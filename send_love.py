@@ -1,7 +1,11 @@
 from flask import Flask, request, jsonify
+import os
 import random
 from twilio.rest import Client
+from twilio.base import values
 from deepseek import DeepSeek
+from delivery_store import IdempotencyStore, StatusBuffer, enqueue_once, status_callback_blueprint
+from message_queue import MessageQueue
 
 app = Flask(__name__)
 
@@ -11,6 +15,8 @@ AUTH_TOKEN = '6b7efbef7fd2eadd07e58c9dadd202e7'
 WHATSAPP_NUMBER = '9315218933'
 
 twilio_client = Client(ACCOUNT_SID, AUTH_TOKEN)
+if os.getenv('TWILIO_API_URL'):
+    twilio_client.api.base_url = os.getenv('TWILIO_API_URL')  # e.g. a local fake_upstreams server
 
 # Initialize DeepSeek AI (configure API key if required)
 deepseek_client = deepseek(api_key='sk-kk2wMZoGX-G8j7yV8FDL3')
@@ -29,6 +35,32 @@ messages = [
     "You are enough, just as you are. 🌿"
 ]
 
+def deliver(job):
+    """Queue worker: build the reply and send it, returning the Twilio message SID"""
+    user_message = job.get("message", "")
+    
+    if user_message:
+        response = deepseek_client.respond(user_message)
+    else:
+        response = random.choice(messages)
+    
+    message = twilio_client.messages.create(
+        body=response,
+        from_=WHATSAPP_NUMBER,
+        to=f'whatsapp:{job["user_number"]}',
+        status_callback=STATUS_CALLBACK_URL
+    )
+    return message.sid
+
+# Delivery tracking: idempotency keys and Twilio status callbacks
+DELIVERY_DB = os.getenv('DELIVERY_DB', 'delivery.db')
+STATUS_CALLBACK_URL = os.getenv('STATUS_CALLBACK_URL') or values.unset  # Public URL of /twilio/status
+sends = IdempotencyStore(DELIVERY_DB)
+statuses = StatusBuffer(DELIVERY_DB)
+app.register_blueprint(status_callback_blueprint(statuses, AUTH_TOKEN))
+
+outbox = MessageQueue(os.getenv('SEND_LOVE_QUEUE_DB', 'send_love_queue.db'), deliver)
+
 @app.route('/send_love', methods=['POST'])
 def send_love():
     data = request.json
@@ -38,18 +70,21 @@ def send_love():
     if not user_number:
         return jsonify({"error": "User number is required"}), 400
     
-    if user_message:
-        response = deepseek_client.respond(user_message)
-    else:
-        response = random.choice(messages)
+    key = request.headers.get('Idempotency-Key') or data.get("idempotency_key")
+    job_id, duplicate = enqueue_once(outbox, sends, key, {"user_number": user_number, "message": user_message})
     
-    twilio_client.messages.create(
-        body=response,
-        from_=WHATSAPP_NUMBER,
-        to=f'whatsapp:{user_number}'
-    )
+    if duplicate:
+        return jsonify({"message": "Duplicate request, already queued", "job_id": job_id}), 200
     
-    return jsonify({"message": "Response sent successfully!"})
+    return jsonify({"message": "Response queued for delivery", "job_id": job_id}), 202
+
+@app.route('/send_love/status/<job_id>', methods=['GET'])
+def send_love_status(job_id):
+    job = outbox.status(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown job id"}), 404
+    job["delivery"] = statuses.status_for(job["result"])
+    return jsonify(job)
 
 if __name__ == '__main__':
     app.run(debug=True)
@@ -1,7 +1,12 @@
 from flask import Flask, request, jsonify
+import os
 import random
 from twilio.rest import Client
+from twilio.base import values
 from deepseek import DeepSeekAPI  # Import the correct DeepSeek class
+from delivery_store import IdempotencyStore, StatusBuffer, enqueue_once, status_callback_blueprint
+from message_queue import MessageQueue
+from reply_cache import ReplyCache
 
 app = Flask(__name__)
 
@@ -13,6 +18,8 @@ TWILIO_PHONE_NUMBER = '+14155238886'
 #WHATSAPP_NUMBER = 'whatsapp:+your_twilio_number'
 
 twilio_client = Client(ACCOUNT_SID, AUTH_TOKEN)
+if os.getenv('TWILIO_API_URL'):
+    twilio_client.api.base_url = os.getenv('TWILIO_API_URL')  # e.g. a local fake_upstreams server
 
 # Initialize DeepSeek AI (configure API key if required)
 deepseek_client = DeepSeekAPI(api_key='sk-kk2wMZoGX-G8j7yV8FDL3')
@@ -31,6 +38,40 @@ messages = [
     "You are enough, just as you are. 🌿"
 ]
 
+# Cached AI replies; falls back to a canned message if DeepSeek is slower than the budget
+replies = ReplyCache(
+    deepseek_client,
+    messages,
+    ttl=float(os.getenv('AI_REPLY_TTL', '3600')),
+    budget=float(os.getenv('AI_REPLY_BUDGET', '3')),
+)
+
+def deliver(job):
+    """Queue worker: build the reply and send it, returning the Twilio message SID"""
+    user_message = job.get("message", "")
+    
+    if user_message:
+        response = replies.reply(user_message)
+    else:
+        response = random.choice(messages)
+    
+    message = twilio_client.messages.create(
+        body=response,
+        from_=TWILIO_PHONE_NUMBER,
+        to=job["user_number"],  # Send as an SMS
+        status_callback=STATUS_CALLBACK_URL
+    )
+    return message.sid
+
+# Delivery tracking: idempotency keys and Twilio status callbacks
+DELIVERY_DB = os.getenv('DELIVERY_DB', 'delivery.db')
+STATUS_CALLBACK_URL = os.getenv('STATUS_CALLBACK_URL') or values.unset  # Public URL of /twilio/status
+sends = IdempotencyStore(DELIVERY_DB)
+statuses = StatusBuffer(DELIVERY_DB)
+app.register_blueprint(status_callback_blueprint(statuses, AUTH_TOKEN))
+
+outbox = MessageQueue(os.getenv('SEND_LOVE_QUEUE_DB', 'send_love2_queue.db'), deliver)
+
 @app.route('/send_love', methods=['POST'])
 def send_love():
     data = request.json
@@ -40,18 +81,21 @@ def send_love():
     if not user_number:
         return jsonify({"error": "User number is required"}), 400
     
-    if user_message:
-        response = deepseek_client.get_response(user_message)  # Adjusted function call
-    else:
-        response = random.choice(messages)
+    key = request.headers.get('Idempotency-Key') or data.get("idempotency_key")
+    job_id, duplicate = enqueue_once(outbox, sends, key, {"user_number": user_number, "message": user_message})
     
-    twilio_client.messages.create(
-        body=response,
-        from_=TWILIO_PHONE_NUMBER,
-        to=user_number  # Send as an SMS
-    )
+    if duplicate:
+        return jsonify({"message": "Duplicate request, already queued", "job_id": job_id}), 200
     
-    return jsonify({"message": "Response sent successfully!"})
+    return jsonify({"message": "Response queued for delivery", "job_id": job_id}), 202
+
+@app.route('/send_love/status/<job_id>', methods=['GET'])
+def send_love_status(job_id):
+    job = outbox.status(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown job id"}), 404
+    job["delivery"] = statuses.status_for(job["result"])
+    return jsonify(job)
 
 if __name__ == '__main__':
     app.run(debug=True)
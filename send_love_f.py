@@ -2,6 +2,10 @@ from flask import Flask, request, jsonify
 import random
 import os
 from twilio.rest import Client
+from twilio.base import values
+from broadcast import Broadcaster, broadcast_blueprint, pooled_http_client
+from delivery_store import IdempotencyStore, StatusBuffer, enqueue_once, status_callback_blueprint
+from message_queue import MessageQueue
 
 app = Flask(__name__)
 
@@ -11,8 +15,15 @@ AUTH_TOKEN = os.getenv('AUTH_TOKEN')
 TWILIO_PHONE_NUMBER = os.getenv('TWILIO_PHONE_NUMBER')
 WHATSAPP_NUMBER = os.getenv('WHATSAPP_NUMBER')
 
-# Initialize Twilio client
-twilio_client = Client(ACCOUNT_SID, AUTH_TOKEN)
+# Broadcast delivery limits
+BROADCAST_RATE = float(os.getenv('BROADCAST_RATE', '50'))  # Messages per second
+BROADCAST_WORKERS = int(os.getenv('BROADCAST_WORKERS', '16'))
+BROADCAST_RETENTION = float(os.getenv('BROADCAST_RETENTION', '3600'))  # Seconds finished broadcasts are kept
+
+# Initialize Twilio client with a connection pool shared by all senders
+twilio_client = Client(ACCOUNT_SID, AUTH_TOKEN, http_client=pooled_http_client(BROADCAST_WORKERS))
+if os.getenv('TWILIO_API_URL'):
+    twilio_client.api.base_url = os.getenv('TWILIO_API_URL')  # e.g. a local fake_upstreams server
 
 # List of love and caring messages
 messages = [
@@ -28,6 +39,29 @@ messages = [
     "You are enough, just as you are. 🌿"
 ]
 
+def deliver(job):
+    """Queue worker: send a random love message, returning the Twilio message SID"""
+    # Choose a random love message
+    response = random.choice(messages)
+    
+    # Send message via Twilio
+    message = twilio_client.messages.create(
+        body=response,
+        from_=TWILIO_PHONE_NUMBER,
+        to=job["user_number"],  # Send as SMS
+        status_callback=STATUS_CALLBACK_URL
+    )
+    return message.sid
+
+# Delivery tracking: idempotency keys and Twilio status callbacks
+DELIVERY_DB = os.getenv('DELIVERY_DB', 'delivery.db')
+STATUS_CALLBACK_URL = os.getenv('STATUS_CALLBACK_URL') or values.unset  # Public URL of /twilio/status
+sends = IdempotencyStore(DELIVERY_DB)
+statuses = StatusBuffer(DELIVERY_DB)
+app.register_blueprint(status_callback_blueprint(statuses, AUTH_TOKEN))
+
+outbox = MessageQueue(os.getenv('SEND_LOVE_QUEUE_DB', 'send_love_f_queue.db'), deliver)
+
 @app.route('/send_love', methods=['POST'])
 def send_love():
     data = request.json
@@ -36,17 +70,33 @@ def send_love():
     if not user_number:
         return jsonify({"error": "User number is required"}), 400
     
-    # Choose a random love message
-    response = random.choice(messages)
+    key = request.headers.get('Idempotency-Key') or data.get("idempotency_key")
+    job_id, duplicate = enqueue_once(outbox, sends, key, {"user_number": user_number})
     
-    # Send message via Twilio
+    if duplicate:
+        return jsonify({"message": "Duplicate request, already queued", "job_id": job_id}), 200
+    
+    return jsonify({"message": "Response queued for delivery", "job_id": job_id}), 202
+
+@app.route('/send_love/status/<job_id>', methods=['GET'])
+def send_love_status(job_id):
+    job = outbox.status(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown job id"}), 404
+    job["delivery"] = statuses.status_for(job["result"])
+    return jsonify(job)
+
+def send_broadcast_message(number, body):
     twilio_client.messages.create(
-        body=response,
+        body=body,
         from_=TWILIO_PHONE_NUMBER,
-        to=user_number  # Send as SMS
+        to=number,
+        status_callback=STATUS_CALLBACK_URL
     )
-    
-    return jsonify({"message": "Response sent successfully!"})
+
+broadcaster = Broadcaster(send_broadcast_message, rate=BROADCAST_RATE, workers=BROADCAST_WORKERS,
+                          retention=BROADCAST_RETENTION)
+app.register_blueprint(broadcast_blueprint(broadcaster, default_body=lambda: random.choice(messages)))
 
 if __name__ == '__main__':
     app.run(debug=True)
@@ -1,7 +1,24 @@
 import os
+import uuid
 from twilio.rest import Client
+from twilio.base import values
 
-def send_love_message(to, message, use_whatsapp=False):
+_sends = None
+
+def _idempotency_store():
+    """Open the shared idempotency store on first use"""
+    global _sends
+    if _sends is None:
+        from delivery_store import IdempotencyStore
+        _sends = IdempotencyStore(os.getenv('DELIVERY_DB', 'delivery.db'))
+    return _sends
+
+def send_love_message(to, message, use_whatsapp=False, idempotency_key=None, raise_errors=False):
+    # Skip sends that were already made under the same idempotency key
+    if idempotency_key and _idempotency_store().claim(idempotency_key, uuid.uuid4().hex):
+        print(f"⚠️ Duplicate send skipped for key {idempotency_key}")
+        return None
+    
     # Fetch credentials from environment variables
     account_sid = os.getenv('ACCOUNT_SID')
     auth_token = os.getenv('AUTH_TOKEN')
@@ -13,17 +30,22 @@ def send_love_message(to, message, use_whatsapp=False):
         to = f'whatsapp:{to}'
         twilio_phone_number = 'whatsapp:+17013531805'  # Use hardcoded Twilio WhatsApp number
     
-    client = Client(account_sid, auth_token)
-    
     try:
+        client = Client(account_sid, auth_token)
         message = client.messages.create(
             body=message,
             from_=twilio_phone_number,
-            to=to
+            to=to,
+            status_callback=os.getenv('STATUS_CALLBACK_URL') or values.unset
         )
         print(f"✅ Message sent! ID: {message.sid}")
+        return message.sid
     except Exception as e:
         print(f"❌ Error: {e}")
+        if idempotency_key:
+            _idempotency_store().release(idempotency_key)
+        if raise_errors:
+            raise
 
 if __name__ == "__main__":
     recipient = input("Enter recipient phone number (with country code): ")
@@ -1,17 +1,22 @@
 import os
+import time
 import logging
 from typing import List, Dict
 import openai
 from anthropic import Anthropic
 import google.generativeai as genai
 
+from consensus import ConsensusTracker
+from model_metrics import ModelMetrics
+
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class ModelClient:
-    def __init__(self):
+    def __init__(self, metrics: ModelMetrics = None):
         self.clients = self._initialize_clients()
+        self.metrics = metrics  # None disables instrumentation
         
     def _initialize_clients(self):
         """Initialize API clients for different providers"""
@@ -21,38 +26,72 @@ class ModelClient:
             "google": genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
         }
 
+    @staticmethod
+    def provider_for(model: str) -> str:
+        """Return the provider key in self.clients that serves the given model"""
+        if model.startswith("gpt"):
+            return "openai"
+        if model.startswith("claude"):
+            return "anthropic"
+        if model.startswith("gemini"):
+            return "google"
+        return "unknown"
+
+    def _call_model(self, model: str, prompt: str):
+        """Call the provider and return (text, prompt_tokens, completion_tokens)"""
+        if model.startswith("gpt"):
+            response = self.clients["openai"].chat.completions.create(
+                model=model,
+                messages=[{"role": "user", "content": prompt}]
+            )
+            usage = response.usage
+            return (response.choices[0].message.content,
+                    getattr(usage, "prompt_tokens", 0), getattr(usage, "completion_tokens", 0))
+
+        elif model.startswith("claude"):
+            response = self.clients["anthropic"].messages.create(
+                model=model,
+                max_tokens=1000,
+                messages=[{"role": "user", "content": prompt}]
+            )
+            usage = response.usage
+            return (response.content[0].text,
+                    getattr(usage, "input_tokens", 0), getattr(usage, "output_tokens", 0))
+
+        elif model.startswith("gemini"):
+            response = genai.generate_content(
+                model=model,
+                contents=prompt
+            )
+            usage = getattr(response, "usage_metadata", None)
+            return (response.text,
+                    getattr(usage, "prompt_token_count", 0), getattr(usage, "candidates_token_count", 0))
+
+        return None, 0, 0
+
     def generate_response(self, model: str, prompt: str) -> str:
         """Generate response from specified model"""
+        if self.metrics is None:
+            try:
+                return self._call_model(model, prompt)[0]
+            except Exception as e:
+                logger.error(f"Error generating response from {model}: {str(e)}")
+                return None
+
+        start = time.perf_counter()
         try:
-            if model.startswith("gpt"):
-                response = self.clients["openai"].chat.completions.create(
-                    model=model,
-                    messages=[{"role": "user", "content": prompt}]
-                )
-                return response.choices[0].message.content
-                
-            elif model.startswith("claude"):
-                response = self.clients["anthropic"].messages.create(
-                    model=model,
-                    max_tokens=1000,
-                    messages=[{"role": "user", "content": prompt}]
-                )
-                return response.content[0].text
-                
-            elif model.startswith("gemini"):
-                response = genai.generate_content(
-                    model=model,
-                    contents=prompt
-                )
-                return response.text
-                
+            text, prompt_tokens, completion_tokens = self._call_model(model, prompt)
         except Exception as e:
+            self.metrics.record(model, time.perf_counter() - start, error=True)
             logger.error(f"Error generating response from {model}: {str(e)}")
             return None
+        self.metrics.record(model, time.perf_counter() - start,
+                            prompt_tokens or 0, completion_tokens or 0)
+        return text
 
 class ConversationOrchestrator:
-    def __init__(self):
-        self.model_client = ModelClient()
+    def __init__(self, model_client: ModelClient = None):
+        self.model_client = model_client or ModelClient()
         self.models = [
             "gpt-4",
             "claude-3-opus-20240229",
@@ -75,9 +114,15 @@ Please respond to the original prompt while considering the previous discussion.
 Your response should address both the original question and any relevant points 
 made in the conversation history. Provide your most comprehensive analysis:"""
 
-    def run_conversation(self, original_prompt: str, iterations: int = 3):
-        """Run the conversation loop for specified iterations"""
+    def run_conversation(self, original_prompt: str, iterations: int = 3,
+                         early_stop_threshold: float = None) -> List[Dict]:
+        """Run the conversation loop for specified iterations and return the history
+
+        If early_stop_threshold is set, stop as soon as every model's response is at
+        least that similar (estimated shingle Jaccard, 0-1) to its previous response.
+        """
         self.conversation_history = []
+        tracker = ConsensusTracker() if early_stop_threshold is not None else None
         
         for iteration in range(iterations):
             logger.info(f"\n=== Iteration {iteration + 1} ===")
@@ -97,6 +142,15 @@ made in the conversation history. Provide your most comprehensive analysis:"""
             
             self.conversation_history.extend(iteration_responses)
 
+            if tracker is not None and iteration_responses:
+                agreement = tracker.agreement(iteration_responses)
+                logger.info(f"Agreement with previous iteration: {agreement:.2f}")
+                if agreement >= early_stop_threshold:
+                    logger.info(f"Models converged after {iteration + 1} iterations, stopping early")
+                    break
+
+        return self.conversation_history
+
 if __name__ == "__main__":
     import argparse
     
@@ -104,8 +158,21 @@ if __name__ == "__main__":
     parser.add_argument("prompt", help="The initial prompt for the conversation")
     parser.add_argument("-i", "--iterations", type=int, default=3,
                         help="Number of conversation iterations")
+    parser.add_argument("--early-stop", type=float, metavar="THRESHOLD",
+                        help="Stop once responses are this similar (0-1) to the previous iteration")
+    parser.add_argument("--metrics-port", type=int,
+                        help="Serve Prometheus metrics for model calls on this port")
+    parser.add_argument("--metrics-json",
+                        help="Write a JSON snapshot of model call metrics to this file")
     
     args = parser.parse_args()
     
-    orchestrator = ConversationOrchestrator()
-    orchestrator.run_conversation(args.prompt, args.iterations)
\ No newline at end of file
+    metrics = ModelMetrics() if args.metrics_port or args.metrics_json else None
+    if args.metrics_port:
+        metrics.serve(args.metrics_port)
+    
+    orchestrator = ConversationOrchestrator(ModelClient(metrics))
+    orchestrator.run_conversation(args.prompt, args.iterations, args.early_stop)
+    
+    if args.metrics_json:
+        metrics.dump(args.metrics_json)
\ No newline at end of file